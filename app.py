@@ -1,12 +1,27 @@
-import re
+import os, re
 import pandas as pd
 import streamlit as st
 
-from parsers import parse_any
-from utils.excel import to_xlsx_bytes
+from parsers import breaker_stats, limiter_stats, parse_any, parse_many, dedup_key, refresh_prices
+from parsers.httpcache import http_cache_stats
+from parsers.render import playwright_readiness, render_stats, start_prewarm
+from utils.excel import diagnostics_frame, rows_to_xlsx_bytes
+from utils.store import ResultStore, SqliteResultStore
+from utils.view import ResultsView, SITE_KO, STATUS_KO, fmt_won, format_rows
 
 st.set_page_config(page_title="도서 정보 자동 채움 웹앱", layout="wide")
 
+# 브라우저 보조 파싱용 Chromium 설치/실행을 미리 시작해 둔다 (프로세스당 한 번)
+start_prewarm()
+
+BROWSER_STATE_KO = {
+    "unknown": "⏳ 준비 전",
+    "launching": "⏳ 브라우저 실행 중",
+    "installing": "⏳ Chromium 설치 중",
+    "ready": "✅ 준비됨",
+    "unavailable": "⚠ 사용 불가",
+}
+
 st.markdown(
     """
 <style>
@@ -40,13 +55,45 @@ with st.expander("✅ 지원서점 / 사용방법 / 참고사항", expanded=True
   5. **결과 엑셀(.xlsx) 다운로드** 버튼 클릭
 - **참고사항**
   - 같은 URL을 다시 조회하면 **기존 행을 교체**합니다.
+  - ISBN이 같은 행이 둘 이상이면 **모든 행**의 비고에 중복 표시가 붙습니다.
   - 일부 서점은 동적 렌더링/봇 차단으로 일반 요청 파싱이 실패할 수 있습니다.
   - 교보문고는 requests 기반 수집을 우선 사용하고, 필요할 때만 보조 파싱을 시도합니다.
 """
     )
 
-if "rows" not in st.session_state:
-    st.session_state.rows = []
+# 환경변수 BOOK_RESULTS_DB에 경로를 주면 결과를 SQLite 파일에 두고 모든 세션이 함께 쓴다
+RESULTS_DB = os.environ.get("BOOK_RESULTS_DB") or None
+# 파싱이 끝나는 대로 이만큼씩 저장소에 쓴다
+WRITE_BATCH = 50
+PAGE_SIZES = [50, 100, 500]
+
+@st.cache_resource
+def _shared_store(path: str) -> SqliteResultStore:
+    return SqliteResultStore(path, dedup_key)
+
+if RESULTS_DB:
+    store = _shared_store(RESULTS_DB)
+else:
+    if "store" not in st.session_state:
+        st.session_state.store = ResultStore(dedup_key)
+    if "view" not in st.session_state:
+        st.session_state.view = ResultsView(st.session_state.store.items())
+    store = st.session_state.store
+
+def _apply(rows: list[dict]) -> tuple[int, int]:
+    added, updated, touched = store.upsert_many(rows)
+    if not RESULTS_DB:
+        st.session_state.view.update({row_id: store.row(row_id) for row_id in touched})
+    return added, updated
+
+def excel_bytes(diagnostics: bool) -> bytes:
+    # 엑셀 등 파생 데이터는 store.version이 같으면 다시 만들지 않는다
+    key = (store.version, diagnostics)
+    cached = st.session_state.get("xlsx_cache")
+    if cached is None or cached[0] != key:
+        cached = (key, rows_to_xlsx_bytes(store.iter_rows(), diagnostics=diagnostics))
+        st.session_state.xlsx_cache = cached
+    return cached[1]
 
 URLS_KEY = "urls_text"
 
@@ -57,9 +104,10 @@ def _normalize_urls_in_textarea() -> None:
     urls = [u for u in urls if re.match(r"^https?://", u)]
     seen, out = set(), []
     for u in urls:
-        if u in seen:
+        key = dedup_key(u)
+        if key in seen:
             continue
-        seen.add(u)
+        seen.add(key)
         out.append(u)
     st.session_state[URLS_KEY] = "\n".join(out)
 
@@ -74,72 +122,13 @@ def normalize_urls(text: str) -> list[str]:
         urls.append(line)
     seen, out = set(), []
     for u in urls:
-        if u in seen:
+        key = dedup_key(u)
+        if key in seen:
             continue
-        seen.add(u)
+        seen.add(key)
         out.append(u)
     return out
 
-def fmt_won(v):
-    if v is None:
-        return ""
-    try:
-        if pd.isna(v):
-            return ""
-    except Exception:
-        pass
-    try:
-        return f"{int(v):,}원"
-    except Exception:
-        return str(v)
-
-STATUS_KO = {"success": "성공", "failed": "실패", "skipped": "제외"}
-PARSEMODE_KO = {
-    "requests": "자동",
-    "playwright": "브라우저",
-    "search-fallback": "검색보조",
-    "skipped": "제외",
-    "unknown": "알수없음",
-    "exception": "오류",
-}
-COLUMN_KO = {
-    "site": "서점",
-    "url": "상품 URL",
-    "status": "처리상태",
-    "isbn": "ISBN",
-    "title": "도서명",
-    "author": "저자",
-    "publisher": "출판사",
-    "list_price": "정가",
-    "sale_price": "판매가",
-    "product_id": "상품ID",
-    "parse_mode": "처리방식",
-    "error": "오류",
-    "note": "비고",
-}
-SITE_KO = {"KYobo": "교보문고", "YES24": "YES24", "ALADIN": "알라딘", "YPBOOKS": "영풍문고"}
-
-def upsert_rows(existing_rows: list[dict], incoming_rows: list[dict]) -> tuple[list[dict], int, int]:
-    index_by_url = {}
-    for idx, row in enumerate(existing_rows):
-        url = str(row.get("url") or "").strip()
-        if url:
-            index_by_url[url] = idx
-
-    added = 0
-    updated = 0
-    for row in incoming_rows:
-        url = str(row.get("url") or "").strip()
-        if url and url in index_by_url:
-            existing_rows[index_by_url[url]] = row
-            updated += 1
-        else:
-            existing_rows.append(row)
-            if url:
-                index_by_url[url] = len(existing_rows) - 1
-            added += 1
-    return existing_rows, added, updated
-
 left_col, right_col = st.columns([1, 2], gap="large")
 
 with left_col:
@@ -155,6 +144,11 @@ with left_col:
             "ALADIN": use_aladin,
             "YPBOOKS": use_yp,
         }
+        browser = playwright_readiness()
+        browser_note = BROWSER_STATE_KO.get(browser["state"], browser["state"])
+        if browser["state"] == "unavailable" and browser.get("retry_in_s") is not None:
+            browser_note += f" · {browser['retry_in_s'] // 60 + 1}분 뒤 다시 확인"
+        st.caption(f"브라우저 보조 파싱: {browser_note}", help=browser.get("detail") or None)
 
 with right_col:
     with st.container(border=True):
@@ -177,41 +171,50 @@ if run:
         st.warning("유효한 URL이 없어요. http(s)로 시작하는 상품 URL을 입력해 주세요.")
     else:
         progress = st.progress(0, text="도서 정보를 가져오는 중...")
-        new_rows = []
-        for i, url in enumerate(urls, start=1):
-            result = parse_any(url, enabled_sites=enabled_sites)
-            new_rows.append(result)
+        # 끝나는 순서대로 받되, 입력 순서로 이어진 앞부분만 WRITE_BATCH개씩 모아 저장한다
+        done: dict[int, dict] = {}
+        next_idx = 0
+        batch: list[dict] = []
+        added_cnt = updated_cnt = 0
+        for i, (idx, result) in enumerate(parse_many(urls, enabled_sites=enabled_sites), start=1):
+            done[idx] = result
+            while next_idx in done:
+                batch.append(done.pop(next_idx))
+                next_idx += 1
+            if len(batch) >= WRITE_BATCH:
+                added, updated = _apply(batch)
+                added_cnt, updated_cnt, batch = added_cnt + added, updated_cnt + updated, []
             progress.progress(i / len(urls), text=f"도서 정보를 가져오는 중... ({i}/{len(urls)})")
+        if batch:
+            added, updated = _apply(batch)
+            added_cnt, updated_cnt = added_cnt + added, updated_cnt + updated
         progress.empty()
-
-        st.session_state.rows, added_cnt, updated_cnt = upsert_rows(st.session_state.rows, new_rows)
-
-        seen_isbn = set()
-        for row in st.session_state.rows:
-            isbn = str(row.get("isbn") or "").strip()
-            if not isbn:
-                continue
-            if isbn in seen_isbn:
-                row["note"] = "⚠ 동일 ISBN 중복"
-            else:
-                if row.get("note") == "⚠ 동일 ISBN 중복":
-                    row["note"] = None
-                seen_isbn.add(isbn)
-
-        st.success(f"{len(new_rows)}개 URL 처리 완료 · 신규 {added_cnt}개 / 업데이트 {updated_cnt}개")
+        st.success(f"{len(urls)}개 URL 처리 완료 · 신규 {added_cnt}개 / 업데이트 {updated_cnt}개")
 
 with st.container(border=True):
-    title_col, reset_col, download_col = st.columns([3.0, 1.3, 2.2], gap="medium")
+    title_col, refresh_col, reset_col, download_col = st.columns([2.4, 1.5, 1.3, 2.2], gap="medium")
     with title_col:
         st.subheader("📊 누적 결과")
+    with refresh_col:
+        refresh = st.button("💲 가격만 새로고침", use_container_width=True, disabled=not len(store),
+                            help="서지 정보는 그대로 두고 정가/판매가만 다시 확인합니다.")
     with reset_col:
         if st.button("🧹 누적 초기화", use_container_width=True):
-            st.session_state.rows = []
+            store.clear()
+            if not RESULTS_DB:
+                st.session_state.view.clear()
             st.rerun()
     with download_col:
-        if st.session_state.rows:
-            df_for_excel = pd.DataFrame(st.session_state.rows)
-            xbytes = to_xlsx_bytes(df_for_excel)
+        diagnostics = st.session_state.get("export_diagnostics", False)
+        cached = st.session_state.get("xlsx_cache")
+        # DB 저장소는 행이 많을 수 있어, 누를 때만 쿼리 결과를 흘려 엑셀을 만든다
+        if RESULTS_DB and len(store) and (cached is None or cached[0] != (store.version, diagnostics)):
+            if st.button("📦 엑셀 만들기", use_container_width=True):
+                with st.spinner("엑셀 파일을 만드는 중..."):
+                    excel_bytes(diagnostics)
+                st.rerun()
+        elif len(store):
+            xbytes = excel_bytes(diagnostics)
             st.download_button(
                 "📥 결과 엑셀(.xlsx) 다운로드",
                 data=xbytes,
@@ -220,27 +223,93 @@ with st.container(border=True):
                 use_container_width=True,
             )
 
-    if st.session_state.rows:
-        df_raw = pd.DataFrame(st.session_state.rows)
-        df_view = df_raw.copy()
-
-        if "site" in df_view.columns:
-            df_view["site"] = df_view["site"].map(SITE_KO).fillna(df_view["site"])
-        if "status" in df_view.columns:
-            df_view["status"] = df_view["status"].map(STATUS_KO).fillna(df_view["status"])
-        if "parse_mode" in df_view.columns:
-            df_view["parse_mode"] = df_view["parse_mode"].map(PARSEMODE_KO).fillna(df_view["parse_mode"])
-
-        for col in ["list_price", "sale_price"]:
-            if col in df_view.columns:
-                df_view[col] = df_view[col].apply(fmt_won)
-
-        df_view = df_view.rename(columns=COLUMN_KO)
-        preferred_cols = ["서점","상품 URL","처리상태","ISBN","도서명","저자","출판사","정가","판매가","비고","상품ID","처리방식","오류"]
-        cols = [c for c in preferred_cols if c in df_view.columns] + [c for c in df_view.columns if c not in preferred_cols]
-        st.dataframe(df_view[cols], use_container_width=True, hide_index=True)
+    if refresh:
+        # 지난번에 가격을 얻은 가장 싼 경로부터, 가능하면 조건부 요청(304)으로 확인한다
+        total_rows = len(store)
+        progress = st.progress(0, text="가격을 확인하는 중...")
+        batch: list[dict] = []
+        changes, not_modified, errors = [], 0, 0
+        # DB 저장소는 쿼리를 조금씩 읽고, 메모리 저장소는 쓰는 도중 순회가 바뀌지 않게 목록으로 고정한다
+        source_rows = store.iter_rows() if RESULTS_DB else list(store.iter_rows())
+        for i, (_, new_row, report) in enumerate(refresh_prices(source_rows), start=1):
+            batch.append(new_row)
+            if report["changed"]:
+                changes.append(report)
+            not_modified += report["not_modified"]
+            errors += report["error"] is not None
+            if len(batch) >= WRITE_BATCH:
+                _apply(batch)
+                batch = []
+            progress.progress(min(1.0, i / total_rows), text=f"가격을 확인하는 중... ({i}/{total_rows})")
+        if batch:
+            _apply(batch)
+        progress.empty()
+        st.success(f"가격 변경 {len(changes)}개 · 변경 없음(304) {not_modified}개 · 확인 실패 {errors}개")
+        if changes:
+            st.dataframe(pd.DataFrame([{
+                "서점": SITE_KO.get(c["site"], c["site"]), "도서명": c["title"],
+                "이전 판매가": fmt_won(c["old"][1]), "새 판매가": fmt_won(c["new"][1]),
+                "이전 정가": fmt_won(c["old"][0]), "새 정가": fmt_won(c["new"][0]), "상품 URL": c["url"],
+            } for c in changes]), use_container_width=True, hide_index=True)
 
-        ok = df_raw[df_raw["status"] == "success"] if "status" in df_raw.columns else df_raw
-        st.caption(f"성공: {len(ok)} / 전체: {len(df_raw)}")
+    page_rows = None
+    if RESULTS_DB and len(store):
+        # 전체를 불러오지 않고 조건에 맞는 한 페이지만 DB에서 읽는다
+        f_site, f_status, f_text, f_size = st.columns([2.0, 1.2, 2.0, 1.0], gap="small")
+        sites = f_site.multiselect("서점", list(SITE_KO), format_func=SITE_KO.get, key="filter_site")
+        status = f_status.selectbox("처리상태", [None, *STATUS_KO], key="filter_status",
+                                    format_func=lambda v: "전체" if v is None else STATUS_KO[v])
+        text = f_text.text_input("검색 (도서명/ISBN/URL)", key="filter_text").strip()
+        page_size = f_size.selectbox("페이지당", PAGE_SIZES, key="page_size")
+        filters = {"site": sites or None, "status": status, "text": text or None}
+        total = store.count(**filters)
+        pages = max(1, -(-total // page_size))
+        # 조건/페이지당 행 수가 바뀌어 페이지 수가 줄면 남아 있던 페이지 번호를 끝 페이지로 당긴다
+        if st.session_state.get("page", 1) > pages:
+            st.session_state["page"] = pages
+        page = st.number_input("페이지", min_value=1, max_value=pages, step=1, key="page") if pages > 1 else 1
+        page_rows = [row for _, row in store.query(offset=(page - 1) * page_size, limit=page_size, **filters)]
+        st.dataframe(format_rows(page_rows), use_container_width=True, hide_index=True)
+        st.caption(f"조건에 맞는 행: {total} · 성공: {store.count(status='success')} / 전체: {len(store)} "
+                   f"· {page}/{pages} 페이지")
+    elif len(store):
+        view = st.session_state.view
+        st.dataframe(view.frame(), use_container_width=True, hide_index=True)
+        st.caption(f"성공: {view.success_count} / 전체: {len(view)}")
     else:
         st.info("아직 누적된 데이터가 없어요. URL을 입력하고 도서 정보 가져오기를 눌러보세요.")
+
+with st.expander("🩺 진단 (단계별 소요 시간)", expanded=False):
+    st.checkbox("엑셀에 '진단' 시트 포함", key="export_diagnostics")
+    if page_rows:
+        # DB 저장소는 지금 보고 있는 페이지의 행만
+        st.dataframe(diagnostics_frame(pd.DataFrame(page_rows)), use_container_width=True, hide_index=True)
+    elif len(store) and not RESULTS_DB:
+        cached = st.session_state.get("diag_cache")
+        if cached is None or cached[0] != store.version:
+            cached = (store.version, diagnostics_frame(pd.DataFrame(list(store.iter_rows()))))
+            st.session_state.diag_cache = cached
+        st.dataframe(cached[1], use_container_width=True, hide_index=True)
+    breakers = breaker_stats()
+    if breakers:
+        st.markdown("**호스트별 회로 차단기** (연속 실패 시 잠시 요청을 건너뜀)")
+        st.dataframe(pd.DataFrame.from_dict(breakers, orient="index"), use_container_width=True)
+    limiters = limiter_stats()
+    if limiters:
+        st.markdown("**호스트별 요청 속도** (초당, 응답 상태에 따라 자동 조정)")
+        st.dataframe(pd.DataFrame.from_dict(limiters, orient="index"), use_container_width=True)
+    hstats = http_cache_stats()
+    if hstats:
+        st.markdown("**HTTP 응답 캐시** (적중/재검증(304)/미스, 저장 용량 바이트)")
+        st.json(hstats)
+    rstats = render_stats()
+    if rstats["pages"]:
+        st.markdown("**브라우저 렌더** (준비 신호/networkidle/마감으로 끝난 페이지, 끊은 요청 수)")
+        st.json(rstats)
+    st.caption("URL 하나를 프로파일러로 실행해 어느 함수에서 시간이 걸리는지 확인할 수 있습니다.")
+    profile_url = st.text_input("프로파일할 상품 URL", key="profile_url")
+    if st.button("⏱ 프로파일 실행") and profile_url.strip():
+        with st.spinner("프로파일링 중..."):
+            prow = parse_any(profile_url.strip(), enabled_sites=enabled_sites, profile=True)
+        st.json(prow.get("timings") or {})
+        st.code(prow.get("profile") or "", language="text")
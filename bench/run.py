@@ -0,0 +1,245 @@
+"""오프라인 성능 측정. 결과는 JSON으로 출력해 커밋끼리 비교할 수 있게 한다.
+
+    python -m bench.run --latency-ms 50 --concurrency 1,4,8,16 --out bench_output.json
+
+- extractors: 픽스처별 추출 단계 CPU 시간(ms, 반복 평균)
+- latency: 스텁 서버를 거친 parse_any 한 건의 처리 시간(ms)
+- throughput: parse_many 동시성별 처리량(URL/s)
+- refresh: 같은 묶음을 전체 파싱한 뒤 가격만 두 번 새로고침했을 때의 시간과 요청 수(파싱 때 남긴 ETag로 첫 회부터 304)
+- memory: tracemalloc 최대치와 프로세스 최대 RSS
+- checks: 픽스처별 __NEXT_DATA__ 가격과 서점 파서 가격이 기대값과 같은지(다르면 종료 코드 1)
+"""
+import argparse, json, os, platform, statistics, subprocess, sys, time, tracemalloc
+from typing import Callable
+
+from parsers import breaker_stats, configure_throttle, limiter_stats, parse_any, parse_many, refresh_prices
+from parsers import common, kyobo, yes24, aladin, ypbooks
+from parsers.httpcache import configure_http_cache
+from parsers.render import render_stats
+from parsers.resultcache import configure_result_cache
+from .stub_server import FIXTURES_DIR, StubStore, load_fixture
+
+SITE_PARSERS = {"kyobo": kyobo, "yes24": yes24, "aladin": aladin, "ypbooks": ypbooks}
+
+# 픽스처 -> 스텁 경로 (parse_any에 넘길 URL)
+FIXTURE_PATHS = {
+    "kyobo_detail.html": "product.kyobobook.co.kr/detail/S000000610612",
+    "kyobo_nextdata.html": "product.kyobobook.co.kr/detail/S000001913217",
+    "kyobo_soldout.html": "product.kyobobook.co.kr/detail/S000000399146",
+    "yes24_detail.html": "www.yes24.com/Product/Goods/168226997",
+    "aladin_detail.html": "www.aladin.co.kr/shop/wproduct.aspx?ItemId=376765918",
+    "ypbooks_detail.html": "www.ypbooks.co.kr/books/202512185684862499?idKey=33",
+}
+
+# extract_next_data_prices 기대값 (정가, 판매가). 워커를 바꿔도 이 값이 그대로여야 한다.
+# 품절 페이지는 상품 가격이 없고 혜택(배송비 3,000/적립금/쿠폰)과 추천 도서 가격만 있으므로 (None, None)이 맞다.
+EXPECTED_NEXT_DATA_PRICES = {
+    "kyobo_detail.html": (13500, 13500),
+    "kyobo_nextdata.html": (15120, 15120),
+    "kyobo_soldout.html": (None, None),
+    "yes24_detail.html": (None, None),
+    "aladin_detail.html": (None, None),
+    "ypbooks_detail.html": (None, None),
+}
+# 서점 파서(parse_from_html) 기대값 (정가, 판매가). 품절 페이지는 보조 추출기도 돌지 않아 가격이 없다.
+EXPECTED_PARSER_PRICES = {
+    "kyobo_detail.html": (13500, 13500),
+    "kyobo_nextdata.html": (15120, 15120),
+    "kyobo_soldout.html": (None, None),
+    "yes24_detail.html": (13500, 13500),
+    "aladin_detail.html": (12000, 10800),
+    "ypbooks_detail.html": (13000, 11700),
+}
+
+# 처리량 측정용: 상품 ID만 바꿔 결과 캐시/중복 제거에 걸리지 않게 한다
+BATCH_TEMPLATES = [
+    "product.kyobobook.co.kr/detail/S0000050{n:05d}",
+    "www.yes24.com/Product/Goods/5{n:07d}",
+    "www.aladin.co.kr/shop/wproduct.aspx?ItemId=5{n:08d}",
+    "www.ypbooks.co.kr/books/5{n:012d}",
+]
+
+def _cpu_ms(fn: Callable[[], object], repeat: int) -> float:
+    t0 = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - t0) / repeat * 1000
+
+def bench_extractors(repeat: int) -> dict:
+    out = {}
+    for name in sorted(FIXTURE_PATHS):
+        html = load_fixture(name).decode("utf-8")
+        site = SITE_PARSERS[name.split("_")[0]]
+
+        def fresh():
+            return common.ParsedPage(html)
+
+        def built(*attrs):
+            page = fresh()
+            for a in attrs:
+                getattr(page, a)
+            return page
+
+        out[name] = {
+            "raw_fastpath": _cpu_ms(lambda: (lambda p: (p.jsonld, p.next_data, p.meta_content(prop="og:title")))(fresh()), repeat),
+            "soup": _cpu_ms(lambda: fresh().soup, repeat),
+            "site_parser": _cpu_ms(lambda: site.parse_from_html("bench", html, "bench"), repeat),
+        }
+        # 이미 만들어 둔 페이지 위에서 각 추출기만 잰다
+        page = built("soup", "text", "next_data")
+        out[name]["text"] = _cpu_ms(lambda: page.soup.get_text(" ", strip=True), repeat)
+        out[name]["text_scan"] = _cpu_ms(lambda: common.TextScan(page.text), repeat)
+        out[name]["next_data_prices"] = _cpu_ms(lambda: common.extract_next_data_prices(page), repeat)
+        out[name]["scan_prices_from_text"] = _cpu_ms(lambda: common.scan_prices_from_text(page.text), repeat)
+    return out
+
+def check_prices() -> dict:
+    out = {"next_data": {}, "site_parser": {}}
+    for name, expected in sorted(EXPECTED_NEXT_DATA_PRICES.items()):
+        got = common.extract_next_data_prices(load_fixture(name).decode("utf-8"))
+        out["next_data"][name] = {"expected": list(expected), "got": list(got), "ok": got == expected}
+    for name, expected in sorted(EXPECTED_PARSER_PRICES.items()):
+        row = SITE_PARSERS[name.split("_")[0]].parse_from_html("bench", load_fixture(name).decode("utf-8"), "bench")
+        got = (row.get("list_price"), row.get("sale_price"))
+        out["site_parser"][name] = {"expected": list(expected), "got": list(got), "ok": got == expected}
+    return out
+
+def bench_latency(store: StubStore, repeat: int) -> dict:
+    out = {}
+    for name, path in sorted(FIXTURE_PATHS.items()):
+        url = store.url(path)
+        times = []
+        row = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            row = parse_any(url, enabled_sites={})
+            times.append((time.perf_counter() - t0) * 1000)
+        out[name] = {
+            "mean_ms": statistics.fmean(times),
+            "p50_ms": statistics.median(times),
+            "max_ms": max(times),
+            "status": row.get("status") if row else None,
+            "parse_mode": row.get("parse_mode") if row else None,
+        }
+    return out
+
+def bench_throughput(store: StubStore, levels: list[int], batch: int) -> list[dict]:
+    out = []
+    for level in levels:
+        urls = [store.url(BATCH_TEMPLATES[i % len(BATCH_TEMPLATES)].format(n=level * 100000 + i)) for i in range(batch)]
+        ok = 0
+        t0 = time.perf_counter()
+        for _, row in parse_many(urls, enabled_sites={}, max_workers=level, host_limits={"127.0.0.1": level}):
+            ok += row.get("status") == "success"
+        dt = time.perf_counter() - t0
+        out.append({"concurrency": level, "urls": batch, "success": ok, "seconds": dt, "urls_per_sec": batch / dt if dt else None})
+    return out
+
+def bench_refresh(store: StubStore, batch: int, level: int = 8) -> list[dict]:
+    urls = [store.url(BATCH_TEMPLATES[i % len(BATCH_TEMPLATES)].format(n=900000 + i)) for i in range(batch)]
+    limits = {"127.0.0.1": level}
+    rows = [None] * batch
+    out = []
+    for mode in ("full", "refresh", "refresh_304"):
+        before = dict(store.stats)
+        changed = 0
+        t0 = time.perf_counter()
+        if mode == "full":
+            for idx, row in parse_many(urls, enabled_sites={}, max_workers=level, host_limits=limits):
+                rows[idx] = row
+        else:
+            for idx, row, report in refresh_prices(list(rows), max_workers=level, host_limits=limits):
+                rows[idx] = row
+                changed += report["changed"]
+        dt = time.perf_counter() - t0
+        out.append({"mode": mode, "urls": batch, "seconds": dt, "urls_per_sec": batch / dt if dt else None,
+                    "requests": store.stats["requests"] - before["requests"],
+                    "not_modified": store.stats["not_modified"] - before["not_modified"],
+                    "bytes": store.stats["bytes"] - before["bytes"], "changed": changed})
+    return out
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(FIXTURES_DIR)).stdout.strip()
+    except Exception:
+        return None
+
+def _max_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+def run(args) -> dict:
+    # 캐시는 측정을 왜곡하므로 끄고, 외부 검색/브라우저 대신 스텁을 쓴다
+    configure_http_cache(None)
+    configure_result_cache(enabled=False)
+    if not args.browser:
+        kyobo.extract_kyobo_prices_playwright = None
+    # 스텁 서버는 한 호스트(127.0.0.1)라 기본 속도 제한을 걸면 처리량이 제한값에 묶인다
+    configure_throttle(enabled=args.throttle)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "config": {k: v for k, v in vars(args).items() if k != "out"},
+        },
+    }
+    report["checks"] = check_prices()
+    report["extractors"] = bench_extractors(args.repeat)
+
+    with StubStore(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate, seed=args.seed) as store:
+        kyobo.DDG_SEARCH_URL = store.url("search/ddg?q=")
+        kyobo.KYOBO_SEARCH_URL = store.url("search/kyobo?keyword=")
+        report["latency"] = bench_latency(store, args.repeat)
+        tracemalloc.start()
+        report["throughput"] = bench_throughput(store, args.concurrency, args.batch)
+        report["refresh"] = bench_refresh(store, args.batch)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report["stub"] = dict(store.stats)
+
+    report["memory"] = {"tracemalloc_peak_mb": peak / 1024 / 1024, "max_rss_mb": _max_rss_mb()}
+    report["pools"] = common.pool_stats()
+    report["fastpath"] = common.fastpath_stats()
+    report["breakers"] = breaker_stats()
+    report["limiters"] = limiter_stats()
+    report["render"] = render_stats()
+    return report
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="도서 파서 오프라인 벤치마크")
+    ap.add_argument("--repeat", type=int, default=5, help="추출기/지연 측정 반복 횟수")
+    ap.add_argument("--batch", type=int, default=200, help="처리량 측정 URL 수")
+    ap.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",") if x], default=[1, 4, 8, 16])
+    ap.add_argument("--latency-ms", type=float, default=50)
+    ap.add_argument("--jitter-ms", type=float, default=10)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--throttle", action="store_true", help="호스트별 요청 속도 제한을 켠 채로 잰다")
+    ap.add_argument("--browser", action="store_true", help="교보 가격 브라우저 보조 추출도 포함")
+    ap.add_argument("--out", help="결과 JSON 파일 (기본: 표준출력)")
+    args = ap.parse_args(argv)
+
+    report = run(args)
+    data = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+    bad = [f"{kind}:{name}" for kind, checks in report["checks"].items()
+           for name, c in checks.items() if not c["ok"]]
+    if bad:
+        print("기대값과 다른 픽스처: " + ", ".join(bad), file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
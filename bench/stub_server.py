@@ -0,0 +1,132 @@
+"""bench/fixtures의 서점 페이지를 돌려주는 로컬 스텁 서버.
+
+URL 경로 첫 부분에 실제 서점 호스트를 넣어 parsers.detect_site / 상품 ID 패턴이 그대로 동작하게 한다.
+    http://127.0.0.1:PORT/product.kyobobook.co.kr/detail/S000000610612
+    http://127.0.0.1:PORT/www.yes24.com/Product/Goods/168226997
+지연(latency_ms ± jitter_ms)과 오류 비율(error_rate, 503 응답)을 조절할 수 있다.
+응답마다 본문 해시로 ETag를 붙이고, If-None-Match가 맞으면 304로 답한다.
+
+    python -m bench.stub_server --port 8765 --latency-ms 80 --error-rate 0.05
+"""
+import argparse, os, random, re, threading, time, zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# (경로 패턴, 픽스처 파일). 위에서부터 먼저 맞는 것을 쓴다.
+ROUTES = [
+    (re.compile(r"^/product\.kyobobook\.co\.kr/detail/S000000399146"), "kyobo_soldout.html"),
+    (re.compile(r"^/product\.kyobobook\.co\.kr/detail/S0000019\d+"), "kyobo_nextdata.html"),
+    (re.compile(r"^/product\.kyobobook\.co\.kr/detail/S\w+"), "kyobo_detail.html"),
+    (re.compile(r"^/www\.yes24\.com/Product/Goods/\d+"), "yes24_detail.html"),
+    (re.compile(r"^/www\.aladin\.co\.kr/shop/wproduct\.aspx"), "aladin_detail.html"),
+    (re.compile(r"^/www\.ypbooks\.co\.kr/books/\d+"), "ypbooks_detail.html"),
+    (re.compile(r"^/search/ddg"), "search_ddg.html"),
+    (re.compile(r"^/search/kyobo"), "search_kyobo.html"),
+]
+
+def load_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+class StubStore:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0,
+                 jitter_ms: float = 0, error_rate: float = 0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.stats = {"requests": 0, "errors": 0, "not_found": 0, "not_modified": 0, "bytes": 0}
+        self._rand = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cache = {name: load_fixture(name) for _, name in ROUTES}
+        self._etags = {name: f'"{zlib.crc32(body):08x}"' for name, body in self._cache.items()}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return self.base_url + "/" + path.lstrip("/")
+
+    def start(self) -> "StubStore":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with store._lock:
+                    store.stats["requests"] += 1
+                    delay = max(0.0, store.latency_ms + store._rand.uniform(-store.jitter_ms, store.jitter_ms))
+                    fail = store._rand.random() < store.error_rate
+                if delay:
+                    time.sleep(delay / 1000)
+                if fail:
+                    with store._lock:
+                        store.stats["errors"] += 1
+                    return self._send(503, b"<html><body>Service Unavailable</body></html>")
+                for pat, name in ROUTES:
+                    if pat.match(self.path):
+                        body, etag = store._cache[name], store._etags[name]
+                        if self.headers.get("If-None-Match") == etag:
+                            with store._lock:
+                                store.stats["not_modified"] += 1
+                            return self._send(304, b"", etag)
+                        with store._lock:
+                            store.stats["bytes"] += len(body)
+                        return self._send(200, body, etag)
+                with store._lock:
+                    store.stats["not_found"] += 1
+                return self._send(404, b"<html><body>Not Found</body></html>")
+
+            def _send(self, code: int, body: bytes, etag: Optional[str] = None):
+                self.send_response(code)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="서점 페이지 스텁 서버")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0)
+    ap.add_argument("--jitter-ms", type=float, default=0)
+    ap.add_argument("--error-rate", type=float, default=0)
+    args = ap.parse_args(argv)
+    store = StubStore(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"serving {FIXTURES_DIR} at {store.base_url}")
+    try:
+        store._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Streamlit 없이 URL 목록을 일괄 처리하는 명령행 도구.
+
+    python cli.py sample_urls.txt -o results.jsonl
+    cat urls.txt | python cli.py - --format csv --xlsx results.xlsx
+    python cli.py results.jsonl --refresh-prices -o refreshed.jsonl
+
+결과는 끝나는 순서대로 한 줄씩 바로 내보내며(input_index로 입력 순서를 알 수 있다),
+입력은 필요한 만큼만 읽으므로 URL 수와 무관하게 메모리 사용량이 일정하다.
+--refresh-prices는 이전 JSONL 결과를 입력으로 받아 서지 필드는 그대로 두고 정가/판매가만 다시 확인한다.
+종료 코드: 0 = 모두 성공/제외, 1 = 실패 행 있음, 2 = 사용법/입력 오류.
+"""
+import argparse, csv, json, os, re, sqlite3, sys, tempfile, time
+from typing import Iterator, TextIO
+
+from parsers import breaker_stats, configure_throttle, limiter_stats, parse_many, refresh_prices
+from parsers.httpcache import http_cache_stats
+from parsers.render import configure_browser_pool
+from parsers.router import detect_site
+
+SITE_OPTIONS = {"kyobo": "KYobo", "yes24": "YES24", "aladin": "ALADIN", "ypbooks": "YPBOOKS"}
+CSV_FIELDS = ["input_index", "site", "url", "status", "isbn", "title", "author", "publisher",
+              "list_price", "sale_price", "product_id", "parse_mode", "error", "total_ms"]
+
+EXIT_OK, EXIT_FAILED, EXIT_USAGE = 0, 1, 2
+
+def iter_urls(stream: TextIO, invalid: list) -> Iterator[str]:
+    """app.py와 같은 규칙: 공백으로 나눈 토큰 중 http(s)로 시작하는 것만. 나머지는 invalid에 센다."""
+    for line in stream:
+        for token in re.split(r"\s+", line.strip()):
+            if not token:
+                continue
+            if re.match(r"^https?://", token):
+                yield token
+            else:
+                invalid[0] += 1
+
+def iter_result_rows(stream: TextIO, invalid: list) -> Iterator[dict]:
+    """이전 JSONL 결과의 행들. JSON 객체가 아니거나 url이 없는 줄은 invalid에 센다."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict) or not row.get("url"):
+            invalid[0] += 1
+            continue
+        row.pop("input_index", None)
+        yield row
+
+class RowWriter:
+    def __init__(self, out: TextIO, fmt: str):
+        self.out = out
+        self.fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, row: dict) -> None:
+        if self._csv is not None:
+            flat = dict(row)
+            flat["total_ms"] = (row.get("timings") or {}).get("total")
+            self._csv.writerow(flat)
+        else:
+            self.out.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        self.out.flush()
+
+def _summary(stats: dict, elapsed: float, invalid: int) -> str:
+    lines = [f"{'site':<10}{'success':>9}{'failed':>8}{'skipped':>9}{'total':>8}"]
+    total = {"success": 0, "failed": 0, "skipped": 0}
+    for site in sorted(stats):
+        st = stats[site]
+        for k in total:
+            total[k] += st.get(k, 0)
+        lines.append(f"{site:<10}{st.get('success', 0):>9}{st.get('failed', 0):>8}{st.get('skipped', 0):>9}{sum(st.values()):>8}")
+    n = sum(total.values())
+    lines.append(f"{'ALL':<10}{total['success']:>9}{total['failed']:>8}{total['skipped']:>9}{n:>8}")
+    rate = n / elapsed if elapsed else 0.0
+    lines.append(f"{elapsed:.1f}s · {rate:.1f} URL/s" + (f" · 무시한 입력 {invalid}개" if invalid else ""))
+    return "\n".join(lines)
+
+class XlsxSpool:
+    """--xlsx용 임시 SQLite 파일. 끝나는 순서대로 넣고 input_index 순으로 다시 읽으므로,
+    행마다 메모리에 남는 것이 없어 입력이 아무리 길어도 메모리가 일정하다."""
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self._conn = sqlite3.connect(self.path)
+        # 다 쓰고 지울 파일이라 저널/동기화는 필요 없다
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("CREATE TABLE rows (idx INTEGER PRIMARY KEY, data TEXT)")
+
+    def add(self, idx: int, row: dict) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO rows VALUES (?, ?)",
+                           (idx, json.dumps(row, ensure_ascii=False, default=str)))
+
+    def rows(self) -> Iterator[dict]:
+        for (data,) in self._conn.execute("SELECT data FROM rows ORDER BY idx"):
+            row = json.loads(data)
+            row.pop("input_index", None)
+            yield row
+
+    def close(self) -> None:
+        self._conn.close()
+        os.unlink(self.path)
+
+def _write_xlsx(spool: XlsxSpool, xlsx_path: str) -> None:
+    """임시 파일에 쌓인 행을 입력 순서대로 다시 읽으며 엑셀로 바로 쓴다."""
+    from utils.excel import write_xlsx
+
+    with open(xlsx_path, "wb") as f:
+        write_xlsx(spool.rows(), f)
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="도서 상품 URL 일괄 처리 (JSONL/CSV 스트리밍 출력)")
+    ap.add_argument("input", help="URL 목록 파일 (한 줄에 하나, '-'이면 표준입력)")
+    ap.add_argument("-o", "--output", default="-", help="결과 파일 (기본: 표준출력)")
+    ap.add_argument("--format", choices=["jsonl", "csv"], help="출력 형식 (기본: 출력 파일 확장자, 없으면 jsonl)")
+    ap.add_argument("--xlsx", help="끝난 뒤 utils.excel 형식의 엑셀 파일도 만든다")
+    ap.add_argument("--workers", type=int, default=8, help="동시 처리 수 (기본 8)")
+    ap.add_argument("--sites", default=",".join(SITE_OPTIONS),
+                    help="처리할 서점 (쉼표 구분: kyobo,yes24,aladin,ypbooks). 나머지는 '제외'로 기록")
+    ap.add_argument("--rate", action="append", default=[], metavar="HOST=RPS",
+                    help="호스트별 기본 요청 속도(초당) 지정. 여러 번 쓸 수 있다")
+    ap.add_argument("--no-throttle", action="store_true", help="호스트별 요청 속도 제한을 끈다")
+    ap.add_argument("--browser-pages", type=int, metavar="N",
+                    help="브라우저 보조 파싱에서 동시에 여는 페이지 수 (기본 6, 환경변수 BOOK_BROWSER_PAGES)")
+    ap.add_argument("--render-limit", action="append", default=[], metavar="HOST=N",
+                    help="브라우저 보조 파싱의 호스트별 동시 페이지 상한. 여러 번 쓸 수 있다")
+    ap.add_argument("--refresh-prices", action="store_true",
+                    help="입력을 이전 JSONL 결과로 보고 가격만 새로고침한다 (--sites는 쓰지 않는다)")
+    ap.add_argument("--quiet", action="store_true", help="진행 상황을 표준에러에 출력하지 않는다")
+    return ap
+
+def main(argv=None) -> int:
+    ap = build_parser()
+    args = ap.parse_args(argv)
+
+    chosen = {s.strip().lower() for s in args.sites.split(",") if s.strip()}
+    unknown = chosen - set(SITE_OPTIONS)
+    if unknown or not chosen:
+        ap.error(f"알 수 없는 서점: {', '.join(sorted(unknown)) or '(없음)'}")
+    enabled_sites = {site: key in chosen for key, site in SITE_OPTIONS.items()}
+    rates = {}
+    for spec in args.rate:
+        host, _, value = spec.partition("=")
+        try:
+            rates[host.strip().lower()] = float(value)
+        except ValueError:
+            ap.error(f"--rate 형식은 HOST=초당요청수 입니다: {spec}")
+    configure_throttle(rates, enabled=not args.no_throttle)
+    pool = {}
+    if args.browser_pages is not None:
+        if args.browser_pages < 1:
+            ap.error("--browser-pages는 1 이상이어야 합니다")
+        pool["max_pages"] = args.browser_pages
+    render_limits = {}
+    for spec in args.render_limit:
+        host, _, value = spec.partition("=")
+        if not value.strip().isdigit() or int(value) < 1:
+            ap.error(f"--render-limit 형식은 HOST=동시페이지수 입니다: {spec}")
+        render_limits[host.strip().lower()] = int(value)
+    if render_limits:
+        pool["host_limits"] = render_limits
+    if pool:
+        configure_browser_pool(**pool)
+    fmt = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+
+    try:
+        src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8-sig")
+    except OSError as e:
+        print(f"입력 파일을 열 수 없습니다: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    try:
+        out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    except OSError as e:
+        print(f"출력 파일을 열 수 없습니다: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    writer = RowWriter(out, fmt)
+    spool = XlsxSpool() if args.xlsx else None
+    invalid = [0]
+    stats: dict[str, dict] = {}
+    price = {"changed": 0, "not_modified": 0, "errors": 0}
+    done = 0
+    interrupted = False
+    t0 = time.perf_counter()
+    workers = max(1, args.workers)
+    if args.refresh_prices:
+        results = refresh_prices(iter_result_rows(src, invalid), max_workers=workers)
+    else:
+        results = ((idx, row, None) for idx, row in parse_many(iter_urls(src, invalid), enabled_sites, max_workers=workers))
+    try:
+        for idx, row, report in results:
+            if report is not None:
+                price["changed"] += report["changed"]
+                price["not_modified"] += report["not_modified"]
+                price["errors"] += report["error"] is not None
+                if report["changed"] and not args.quiet:
+                    print(f"가격 변경 {report['title'] or report['url']}: 정가 {report['old'][0]} → {report['new'][0]}, "
+                          f"판매가 {report['old'][1]} → {report['new'][1]}", file=sys.stderr)
+            row = {"input_index": idx, **row}
+            writer.write(row)
+            if spool is not None:
+                spool.add(idx, row)
+            site_stats = stats.setdefault(row.get("site") or detect_site(row.get("url") or ""), {})
+            status = row.get("status") or "failed"
+            site_stats[status] = site_stats.get(status, 0) + 1
+            done += 1
+            if not args.quiet and done % 100 == 0:
+                print(f"... {done}개 처리 ({done / (time.perf_counter() - t0):.1f} URL/s)", file=sys.stderr)
+    except KeyboardInterrupt:
+        interrupted = True
+        print("중단됨", file=sys.stderr)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+
+    try:
+        if done == 0:
+            if args.refresh_prices:
+                print("새로고침할 행이 없습니다. 이전 결과 JSONL(한 줄에 행 하나)을 넣어 주세요.", file=sys.stderr)
+            else:
+                print("처리할 URL이 없습니다. http(s)로 시작하는 상품 URL을 한 줄에 하나씩 넣어 주세요.", file=sys.stderr)
+            return EXIT_USAGE
+        if spool is not None:
+            _write_xlsx(spool, args.xlsx)
+    finally:
+        if spool is not None:
+            spool.close()
+
+    print(_summary(stats, time.perf_counter() - t0, invalid[0]), file=sys.stderr)
+    if args.refresh_prices:
+        print(f"가격 변경 {price['changed']}개 · 변경 없음(304) {price['not_modified']}개 · 확인 실패 {price['errors']}개",
+              file=sys.stderr)
+    for host, lim in limiter_stats().items():
+        print(f"속도 {host}: {lim['rate']}/s (기본 {lim['base_rate']}/s, 대기 {lim['waited']}회 {lim['wait_ms']}ms)", file=sys.stderr)
+    hc = http_cache_stats()
+    if hc:
+        print(f"HTTP 캐시: 적중 {hc['hits']} · 재검증 {hc['revalidated']} · 미스 {hc['misses']} · "
+              f"{hc['bytes'] / 1024 / 1024:.1f}/{hc['max_bytes'] / 1024 / 1024:.0f}MB", file=sys.stderr)
+    for host, br in breaker_stats().items():
+        if br["trips"]:
+            print(f"회로 차단 {host}: {br['trips']}회 (건너뛴 요청 {br['rejected']}개, 마지막 실패 {br['last_failure']}, 현재 {br['state']})", file=sys.stderr)
+    failed = sum(st.get("failed", 0) for st in stats.values())
+    return EXIT_FAILED if failed or price["errors"] or interrupted else EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,5 @@
-from .router import parse_any
+from .router import parse_any, parse_many, canonical_key, dedup_key
+from .retry import FetchError, CircuitOpenError, breaker_stats, configure_breakers
+from .throttle import configure_throttle, limiter_stats
+from .bibcache import configure_bib_cache, get_bib_cache, normalize_isbn
+from .refresh import refresh_price, refresh_prices
@@ -1,10 +1,13 @@
 import re
-from .common import fetch_html, soup, extract_jsonld, pick_booklike, parse_price, scan_prices_from_text, scan_isbn
+from .common import PRICE_HTML, PRICE_RENDER, ParsedPage, fetch_page, parse_price, record_fastpath, scan_prices_from_text, scan_isbn
 from .render import fetch_html_playwright
+from .retry import NOT_FOUND, FetchError
+from .timing import stage
 
-def _parse_from_html(final_url: str, html: str, product_id: str | None) -> dict:
-    s = soup(html)
-    book = pick_booklike(extract_jsonld(s)) or {}
+def parse_from_html(final_url: str, html: str, product_id: str | None) -> dict:
+    """이미 받아 둔 상품 페이지 HTML에서 행을 만든다(요청 없음). parse_mode/price_source는 호출한 쪽이 채운다."""
+    page = ParsedPage(html, final_url)
+    book = page.book
     title = book.get("name") or None
     author=None; publisher=None; isbn=None
     list_price=None; sale_price=None
@@ -32,18 +35,18 @@ def _parse_from_html(final_url: str, html: str, product_id: str | None) -> dict:
         sale_price=list_price
 
     if not title:
-        og=s.find("meta", property="og:title")
-        title=og.get("content").strip() if og and og.get("content") else None
+        og=page.meta_content(prop="og:title")
+        title=og.strip() if og else None
 
-    text=s.get_text(" ", strip=True)
     if not isbn:
-        isbn = scan_isbn(text)
+        isbn = scan_isbn(page)
 
     if list_price is None or sale_price is None:
-        lp, sp = scan_prices_from_text(text)
+        lp, sp = scan_prices_from_text(page)
         list_price=list_price or lp
         sale_price=sale_price or sp
 
+    record_fastpath("ALADIN", page)
     status="success" if (title or isbn) and (sale_price is not None or list_price is not None) else "failed"
     err=None if status=="success" else "필수 정보를 찾지 못했습니다(페이지 구조/차단 가능)."
 
@@ -54,11 +57,20 @@ def _parse_from_html(final_url: str, html: str, product_id: str | None) -> dict:
 def parse_aladin(url: str) -> dict:
     m=re.search(r"ItemId=(\d+)", url)
     product_id=m.group(1) if m else None
-    final_url, html = fetch_html(url)
-    row=_parse_from_html(final_url, html, product_id)
-    row["parse_mode"]="requests"
-    if row["status"]=="success": return row
-    final_url2, html2 = fetch_html_playwright(url)
-    row2=_parse_from_html(final_url2, html2, product_id)
+    try:
+        fetched = fetch_page(url, revalidate=False)
+    except FetchError as e:
+        # 차단/장애/회로 차단이면 바로 브라우저로. 없는 상품은 브라우저로 가도 같다.
+        if e.kind==NOT_FOUND: raise
+    else:
+        with stage("parse"):
+            row=parse_from_html(fetched.final_url, fetched.html, product_id)
+        row["parse_mode"]="requests"; row["price_source"]=PRICE_HTML; row["validators"]=fetched.validators
+        if row["status"]=="success": return row
+    with stage("render"):
+        final_url2, html2 = fetch_html_playwright(url)
+    with stage("parse"):
+        row2=parse_from_html(final_url2, html2, product_id)
     row2["parse_mode"]="playwright"
+    row2["price_source"]=PRICE_RENDER if row2["status"]=="success" else None
     return row2
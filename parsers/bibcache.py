@@ -0,0 +1,136 @@
+import json, os, re, sqlite3, threading, time
+from collections import OrderedDict
+from typing import Optional
+
+# 서점과 무관하게 ISBN으로 같은 책을 가리키는 서지 필드. 가격은 서점마다 달라 담지 않는다.
+BIB_FIELDS = ("title", "author", "publisher")
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ITEMS = 50000
+
+def normalize_isbn(isbn) -> Optional[str]:
+    """하이픈/공백을 지우고 ISBN-10은 ISBN-13(978)으로 바꾼다. ISBN 모양이 아니면 None."""
+    s = re.sub(r"[^0-9Xx]", "", str(isbn or "")).upper()
+    if len(s) == 13 and s.isdigit():
+        return s
+    if len(s) == 10 and s[:9].isdigit():
+        core = "978" + s[:9]
+        check = (10 - sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(core)) % 10) % 10
+        return core + str(check)
+    return None
+
+class BibCache:
+    """ISBN -> 서지 정보(도서명/저자/출판사). 메모리 LRU + 선택적 SQLite 파일.
+
+    여러 서점에서 얻은 값을 합쳐 두며, 이미 있는 필드는 덮어쓰지 않는다(처음 채운 값이 유지된다).
+    """
+
+    def __init__(self, ttl: int = DEFAULT_TTL, path: Optional[str] = None, max_items: int = DEFAULT_MAX_ITEMS):
+        self.ttl = ttl
+        self.max_items = max_items
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "filled_fields": 0}
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS bib (isbn TEXT PRIMARY KEY, stored_at REAL, data TEXT)")
+
+    def _load(self, isbn: str) -> Optional[tuple]:
+        hit = self._mem.get(isbn)
+        if hit is None and self._conn is not None:
+            rec = self._conn.execute("SELECT stored_at, data FROM bib WHERE isbn = ?", (isbn,)).fetchone()
+            if rec is not None:
+                hit = (rec[0], json.loads(rec[1]))
+                self._remember(isbn, hit)
+        if hit is not None and time.time() - hit[0] >= self.ttl:
+            return None
+        return hit
+
+    def get(self, isbn) -> Optional[dict]:
+        key = normalize_isbn(isbn)
+        if key is None:
+            return None
+        with self._lock:
+            hit = self._load(key)
+            if hit is None:
+                self.stats["misses"] += 1
+                return None
+            self._mem.move_to_end(key)
+            self.stats["hits"] += 1
+            return dict(hit[1])
+
+    def put(self, row: dict) -> None:
+        """성공한 행의 서지 필드를 ISBN 아래에 합쳐 둔다. 새로 채울 필드가 없으면 쓰지 않는다."""
+        key = normalize_isbn(row.get("isbn"))
+        if key is None:
+            return
+        fresh = {k: row[k] for k in BIB_FIELDS if row.get(k)}
+        if not fresh:
+            return
+        with self._lock:
+            hit = self._load(key)
+            data = dict(hit[1]) if hit is not None else {}
+            merged = {**fresh, **data}
+            if hit is not None and merged == data:
+                return
+            entry = (time.time(), merged)
+            self._remember(key, entry)
+            self.stats["stores"] += 1
+            if self._conn is not None:
+                self._conn.execute("INSERT OR REPLACE INTO bib VALUES (?, ?, ?)",
+                                   (key, entry[0], json.dumps(merged, ensure_ascii=False)))
+
+    def fill(self, row: dict) -> list[str]:
+        """row에 비어 있는 서지 필드를 캐시에서 채운다. 채운 필드 이름 목록을 돌려준다."""
+        if all(row.get(k) for k in BIB_FIELDS) or not row.get("isbn"):
+            return []
+        data = self.get(row.get("isbn"))
+        if not data:
+            return []
+        filled = [k for k in BIB_FIELDS if not row.get(k) and data.get(k)]
+        for k in filled:
+            row[k] = data[k]
+        if filled:
+            with self._lock:
+                self.stats["filled_fields"] += len(filled)
+        return filled
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM bib")
+
+_cache: Optional[BibCache] = None
+_cache_lock = threading.Lock()
+_cache_checked = False
+
+def configure_bib_cache(ttl: int = DEFAULT_TTL, path: Optional[str] = None,
+                        max_items: int = DEFAULT_MAX_ITEMS, enabled: bool = True) -> Optional[BibCache]:
+    global _cache, _cache_checked
+    with _cache_lock:
+        _cache = BibCache(ttl=ttl, path=path, max_items=max_items) if enabled else None
+        _cache_checked = True
+        return _cache
+
+def get_bib_cache() -> Optional[BibCache]:
+    """기본은 메모리 캐시. 환경변수 BOOK_BIB_CACHE에 경로를 주면 파일에도 남긴다."""
+    global _cache, _cache_checked
+    if not _cache_checked:
+        with _cache_lock:
+            if not _cache_checked:
+                _cache = BibCache(path=os.environ.get("BOOK_BIB_CACHE") or None)
+                _cache_checked = True
+    return _cache
+
+def fill_bibliographic(row: dict) -> list[str]:
+    """전역 서지 캐시로 row의 빈 서지 필드를 채운다. 캐시가 꺼져 있으면 아무 일도 하지 않는다."""
+    cache = get_bib_cache()
+    return cache.fill(row) if cache is not None else []
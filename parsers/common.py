@@ -1,7 +1,26 @@
-import json, re, time
-from typing import Optional, Tuple, Any
+import html as htmllib
+import json, re, threading, time
+from bisect import bisect_left
+from functools import cached_property
+from typing import NamedTuple, Optional, Tuple, Any, Iterator, Union
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from .httpcache import get_http_cache
+from .throttle import get_limiter
+from .timing import count, stage
+from .retry import (
+    CONNECTION, HOST_FAILURES, RETRYABLE, SHORT, TIMEOUT, BLOCKED, FetchError,
+    backoff_delay, classify_status, get_breaker, looks_like_challenge,
+)
+
+# 가격을 얻은 경로(행의 price_source). 가격만 새로고침할 때 지난번에 통한 경로부터 시도한다.
+PRICE_HTML = "html"        # 상품 페이지 HTML
+PRICE_SEARCH = "search"    # 검색 보조(교보)
+PRICE_RENDER = "render"    # 브라우저 렌더
+# 가격 새로고침용 내부 필드. 표/엑셀 본문에는 내보내지 않는다.
+PRICE_STATE_KEYS = ("price_source", "validators")
 
 DEFAULT_HEADERS = {
     "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
@@ -13,14 +32,139 @@ DEFAULT_HEADERS = {
     "Upgrade-Insecure-Requests": "1",
 }
 
+# 호스트별 keep-alive 커넥션 풀 크기 (목록에 없는 호스트는 DEFAULT_POOL_SIZE)
+HOST_POOL_SIZE = {
+    "product.kyobobook.co.kr": 8,
+    "search.kyobobook.co.kr": 4,
+    "www.yes24.com": 8,
+    "www.aladin.co.kr": 8,
+    "www.ypbooks.co.kr": 8,
+    "html.duckduckgo.com": 4,
+}
+DEFAULT_POOL_SIZE = 4
+
+_adapters_lock = threading.Lock()
+_adapters: dict[str, HTTPAdapter] = {}
+_local = threading.local()
+
+def _shared_adapters() -> dict[str, HTTPAdapter]:
+    """프로세스 전체가 공유하는 어댑터(=커넥션 풀). urllib3 풀은 스레드 안전하다."""
+    with _adapters_lock:
+        if not _adapters:
+            for host, size in HOST_POOL_SIZE.items():
+                for scheme in ("https://", "http://"):
+                    _adapters[f"{scheme}{host}/"] = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+            default = HTTPAdapter(pool_connections=32, pool_maxsize=DEFAULT_POOL_SIZE)
+            _adapters["https://"] = default
+            _adapters["http://"] = default
+        return dict(_adapters)
+
 def _make_session() -> requests.Session:
     s = requests.Session()
     s.headers.update(DEFAULT_HEADERS)
+    for prefix, adapter in _shared_adapters().items():
+        s.mount(prefix, adapter)
     return s
 
+def get_session() -> requests.Session:
+    """스레드마다 하나씩 두는 Session. 커넥션 풀은 모든 스레드가 공유한다."""
+    sess = getattr(_local, "session", None)
+    if sess is None:
+        sess = _make_session()
+        _local.session = sess
+    return sess
+
+def throttled_get(get, url: str, **kwargs) -> requests.Response:
+    """호스트별 토큰 버킷 차례를 기다려 get(url)을 부르고, 응답 코드/지연을 버킷에 알려준다."""
+    bucket = get_limiter(url)
+    if bucket is None:
+        return get(url, **kwargs)
+    with stage("throttle"):
+        bucket.acquire()
+    t0 = time.monotonic()
+    try:
+        resp = get(url, **kwargs)
+    except Exception:
+        bucket.feedback(ok=False)
+        raise
+    bucket.feedback(resp.status_code, time.monotonic() - t0)
+    return resp
+
+def http_get(url: str, timeout: int = 20, **kwargs) -> requests.Response:
+    return throttled_get(get_session().get, url, timeout=timeout, **kwargs)
+
+def pool_stats() -> dict[str, dict]:
+    """호스트별 요청 수 / 새로 연 커넥션 수 / 재사용 횟수 / 유휴 커넥션 수."""
+    stats: dict[str, dict] = {}
+    seen = set()
+    for adapter in _shared_adapters().values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            st = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "reused": 0, "idle": 0})
+            st["requests"] += pool.num_requests
+            st["connections"] += pool.num_connections
+            st["idle"] += pool.pool.qsize() if pool.pool is not None else 0
+    for st in stats.values():
+        st["reused"] = max(0, st["requests"] - st["connections"])
+    return stats
+
+class FetchedPage(NamedTuple):
+    final_url: str
+    html: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    not_modified: bool = False
+
+    @property
+    def validators(self) -> Optional[dict]:
+        """다음 조건부 요청에 쓸 검증자. 서버가 ETag/Last-Modified를 주지 않았으면 None."""
+        if self.etag or self.last_modified:
+            return {"etag": self.etag, "last_modified": self.last_modified}
+        return None
+
 def fetch_html(url: str, timeout: int = 20) -> Tuple[str, str]:
-    """브라우저와 비슷한 헤더로 시도하고, 실패 시 모바일 UA로 한 번 더 재시도."""
-    sess = _make_session()
+    """브라우저와 비슷한 헤더로 시도하고, 실패 시 모바일 UA로 한 번 더 재시도.
+
+    404처럼 다시 해도 같은 실패는 바로 FetchError로 끝내고, 재시도 사이에는 지수 백오프(지터 포함)를 둔다.
+    호스트 실패가 이어져 회로 차단기가 열려 있으면 요청 없이 CircuitOpenError를 낸다.
+    """
+    with stage("fetch"):
+        page = _fetch_html(url, timeout)
+    return page.final_url, page.html
+
+def fetch_page(url: str, validators: Optional[dict] = None, timeout: int = 20, revalidate: bool = True) -> FetchedPage:
+    """fetch_html과 같되 검증자(ETag/Last-Modified)까지 돌려주고, 응답 캐시가 아직 신선해도 서버에 조건부 요청으로 다시 묻는다.
+
+    validators({"etag", "last_modified"})는 응답 캐시에 이 URL이 없을 때 쓴다.
+    304이면 not_modified=True이고, 캐시에 본문이 없었다면 html은 빈 문자열이다.
+    revalidate=False면 fetch_html처럼 신선한 캐시를 그대로 쓴다(처음 파싱할 때 검증자만 얻으려는 경우).
+    """
+    with stage("fetch"):
+        return _fetch_html(url, timeout, revalidate=revalidate, validators=validators)
+
+def _fetch_html(url: str, timeout: int, revalidate: bool = False, validators: Optional[dict] = None) -> FetchedPage:
+    sess = get_session()
+    cache = get_http_cache()
+    cached = cache.lookup(url) if cache else None
+    if cached and cached.fresh and not revalidate:
+        count("cache_hit")
+        return FetchedPage(cached.final_url, cached.body, cached.etag, cached.last_modified)
+    breaker = get_breaker((urlparse(url).hostname or "").lower())
+    breaker.before_request()
+    # 캐시 본문이 있으면 그 본문의 검증자를 써야 304 때 돌려줄 본문과 맞는다
+    etag, last_modified = (cached.etag, cached.last_modified) if cached else \
+        ((validators or {}).get("etag"), (validators or {}).get("last_modified"))
+    conditional = {}
+    if etag:
+        conditional["If-None-Match"] = etag
+    if last_modified:
+        conditional["If-Modified-Since"] = last_modified
     tries = [
         {},
         {"Referer": "https://www.google.com/"},
@@ -28,26 +172,167 @@ def fetch_html(url: str, timeout: int = 20) -> Tuple[str, str]:
                         "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 "
                         "Mobile/15E148 Safari/604.1")},
     ]
-    last_err = None
-    for extra in tries:
+    last_err: Optional[FetchError] = None
+    for attempt, extra in enumerate(tries):
+        if attempt:
+            time.sleep(backoff_delay(attempt - 1))
+        headers = dict(sess.headers)
+        headers.update(extra)
+        headers.update(conditional)
+        count("fetch_attempts")
         try:
-            headers = dict(sess.headers)
-            headers.update(extra)
-            resp = sess.get(url, headers=headers, timeout=timeout, allow_redirects=True)
-            resp.raise_for_status()
-            text = resp.text or ""
-            if len(text) >= 200:
-                return resp.url, text
+            resp = throttled_get(sess.get, url, headers=headers, timeout=timeout, allow_redirects=True)
+        except requests.Timeout as e:
+            last_err = FetchError(TIMEOUT, f"시간 초과: {e}")
+            continue
         except Exception as e:
-            last_err = e
-        time.sleep(0.2)
-    if last_err:
-        raise last_err
-    raise RuntimeError("HTML을 가져오지 못했습니다.")
+            last_err = FetchError(CONNECTION, f"연결 실패: {type(e).__name__}: {e}")
+            continue
+        count("bytes", len(resp.content or b""))
+        if conditional and resp.status_code == 304:
+            count("cache_hit")
+            breaker.record_success()
+            if cached:
+                cache.revalidated(cached.final_url)
+                return FetchedPage(cached.final_url, cached.body, etag, last_modified, True)
+            return FetchedPage(url, "", etag, last_modified, True)
+        kind = classify_status(resp.status_code)
+        text = (resp.text or "") if kind is None else ""
+        if kind is None and looks_like_challenge(text):
+            kind = BLOCKED
+        if kind is None and len(text) < 200:
+            kind = SHORT
+        if kind is None:
+            breaker.record_success()
+            page = FetchedPage(resp.url, text, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+            if cache:
+                cache.store(url, page.final_url, text, page.etag, page.last_modified)
+            return page
+        last_err = FetchError(kind, f"HTTP {resp.status_code} ({kind}): {url}", status=resp.status_code)
+        if kind not in RETRYABLE:
+            break
+    # 성공은 200/304에서만 센다. 없는 상품(404) 같은 실패는 호스트가 아프다는 신호가 아니라 차단기를 건드리지 않는다.
+    if last_err is not None and last_err.kind in HOST_FAILURES:
+        breaker.record_failure(last_err.kind)
+    else:
+        breaker.release()
+    raise last_err or FetchError(SHORT, "HTML을 가져오지 못했습니다.")
 
 def soup(html: str) -> BeautifulSoup:
     return BeautifulSoup(html, "lxml")
 
+# 원문 HTML에서 주석/<script>/<meta>만 한 번에 훑는 토큰 패턴 (전체 DOM을 만들지 않는 빠른 경로)
+_RAW_TOKENS = re.compile(r"<!--.*?-->|<script\b([^>]*)>(.*?)</script\s*>|<meta\b([^>]*)>", re.S | re.I)
+_RAW_ATTR = re.compile(r"""([^\s=/>"']+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+
+def _raw_attrs(raw: str) -> dict[str, str]:
+    attrs: dict[str, str] = {}
+    for m in _RAW_ATTR.finditer(raw):
+        name = m.group(1).lower()
+        if name not in attrs:
+            val = m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None else m.group(4) or ""
+            attrs[name] = htmllib.unescape(val)
+    return attrs
+
+class ParsedPage:
+    """가져온 HTML 한 건. 트리/정규화 텍스트/JSON-LD/__NEXT_DATA__/meta를 처음 쓸 때 한 번만 만든다.
+
+    JSON-LD, __NEXT_DATA__, meta는 원문에서 바로 뽑으므로, 이것만으로 필요한 값이 다 채워지면
+    BeautifulSoup 트리는 끝내 만들어지지 않는다(dom_built로 확인).
+    """
+
+    def __init__(self, html: str, url: str = ""):
+        self.html = html or ""
+        self.url = url
+
+    @cached_property
+    def soup(self) -> BeautifulSoup:
+        return soup(self.html)
+
+    @property
+    def dom_built(self) -> bool:
+        return "soup" in self.__dict__
+
+    @cached_property
+    def text(self) -> str:
+        return re.sub(r"\s+", " ", self.soup.get_text(" ", strip=True))
+
+    @cached_property
+    def scan(self) -> "TextScan":
+        return TextScan(self.text)
+
+    @cached_property
+    def _raw(self) -> dict:
+        scripts_ld: list[str] = []
+        next_data = None
+        meta: dict[str, dict[str, Optional[str]]] = {"property": {}, "name": {}}
+        for m in _RAW_TOKENS.finditer(self.html):
+            if m.group(2) is not None:
+                attrs = _raw_attrs(m.group(1))
+                if re.search(r"ld\+json", attrs.get("type", ""), re.I):
+                    scripts_ld.append(m.group(2))
+                elif next_data is None and attrs.get("id") == "__NEXT_DATA__":
+                    next_data = m.group(2)
+            elif m.group(3) is not None:
+                attrs = _raw_attrs(m.group(3))
+                for attr in ("property", "name"):
+                    key = attrs.get(attr)
+                    if key and key not in meta[attr]:
+                        meta[attr][key] = attrs.get("content")
+        return {"jsonld": scripts_ld, "next_data": next_data, "meta": meta}
+
+    @cached_property
+    def jsonld(self) -> list[dict]:
+        return _load_jsonld(self._raw["jsonld"])
+
+    @cached_property
+    def book(self) -> dict:
+        return pick_booklike(self.jsonld) or {}
+
+    @cached_property
+    def next_data(self) -> Any:
+        raw = self._raw["next_data"]
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except Exception:
+            return None
+
+    def meta_content(self, prop: Optional[str] = None, name: Optional[str] = None) -> Optional[str]:
+        """<meta property=...> 또는 <meta name=...>의 content 원문(첫 태그 기준)."""
+        meta = self._raw["meta"]
+        if prop and meta["property"].get(prop):
+            return meta["property"][prop]
+        if name and meta["name"].get(name):
+            return meta["name"][name]
+        return None
+
+# 사이트별로 빠른 경로(JSON-LD/__NEXT_DATA__/meta)만으로 끝난 페이지와 DOM까지 만든 페이지 수
+_fastpath_lock = threading.Lock()
+_fastpath: dict[str, dict[str, int]] = {}
+
+def record_fastpath(site: str, page: ParsedPage) -> None:
+    with _fastpath_lock:
+        st = _fastpath.setdefault(site, {"fast": 0, "dom": 0})
+        st["dom" if page.dom_built else "fast"] += 1
+
+def fastpath_stats() -> dict[str, dict]:
+    with _fastpath_lock:
+        out = {}
+        for site, st in _fastpath.items():
+            total = st["fast"] + st["dom"]
+            out[site] = dict(st, ratio=(st["fast"] / total) if total else None)
+        return out
+
+PageOrText = Union[ParsedPage, str]
+
+def _page_text(src: PageOrText) -> str:
+    # ParsedPage.text는 이미 공백이 정규화되어 있다
+    if isinstance(src, ParsedPage):
+        return src.text
+    return re.sub(r"\s+", " ", src)
+
 def parse_price(text: Optional[str]) -> Optional[int]:
     if not text: return None
     digits = re.sub(r"[^\d]", "", text)
@@ -56,9 +341,12 @@ def parse_price(text: Optional[str]) -> Optional[int]:
     except ValueError: return None
 
 def extract_jsonld(s: BeautifulSoup) -> list[dict]:
+    return _load_jsonld(tag.string or tag.get_text()
+                        for tag in s.find_all("script", attrs={"type": re.compile(r"ld\+json", re.I)}))
+
+def _load_jsonld(raws) -> list[dict]:
     blocks = []
-    for tag in s.find_all("script", attrs={"type": re.compile(r"ld\+json", re.I)}):
-        raw = tag.string or tag.get_text()
+    for raw in raws:
         if not raw: continue
         raw = raw.strip()
         try:
@@ -83,99 +371,213 @@ def pick_booklike(jsonlds: list[dict]) -> Optional[dict]:
                     if t and any(k in str(t).lower() for k in ["book","product"]): return node
     return None
 
-def scan_isbn(text: str) -> Optional[str]:
-    t = re.sub(r"\s+", " ", text)
-    m = re.search(r"(97[89]\d{10})", t)
-    return m.group(1) if m else None
+# 본문 한 번 훑기: 숫자 덩어리([\d,]+, 뒤에 "원"이 붙었는지 포함)와 가격/출판사 라벨 위치를 함께 모은다.
+# 라벨끼리는 서로 겹치지 않으며, "할인가"는 "할인" 위치로도 기록한다.
+_SCAN_TOKENS = re.compile(r"(,*\d[\d,]*)(\s*원)?|(정가|판매가|할인가|할인|판매 가격|출판사)")
+_ASCII_TAIL = re.compile(r"[0-9][0-9,]*$")
+_ISBN13 = re.compile(r"97[89]\d{10}")
+_PUBLISHER_AT = re.compile(r"출판사\s*[:\-]?\s*([가-힣A-Za-z0-9·&()\-\s]{2,40})")
+_PUBLISHER_STOP = re.compile(r"(발행일|쪽수|정가|판매가|ISBN|저자|리뷰)")
+# 가격 앞 25자 안에 이런 말이 있으면 상품가가 아닌 부가 금액으로 본다
+_PRICE_CONTEXT = re.compile(r"배송비|적립금|적립|포인트|할인쿠폰|쿠폰|회원가|최대|혜택|캐시|마일리지")
+PRICE_CONTEXT_CLASS = {
+    "배송비": "shipping",
+    "적립금": "points", "적립": "points", "포인트": "points", "캐시": "points", "마일리지": "points",
+    "할인쿠폰": "coupon", "쿠폰": "coupon",
+    "회원가": "member",
+    "최대": "promo", "혜택": "promo",
+}
+
+def _run_value(run: str) -> int:
+    # 숫자와 쉼표로만 된 덩어리라 parse_price의 정규식 치환 없이 바로 변환 가능
+    return int(run.replace(",", ""))
+
+class TextScan:
+    """정규화된 본문을 한 번만 훑어 만든 가격/ISBN/출판사 후보 목록.
 
-def scan_publisher(text: str) -> Optional[str]:
-    t = re.sub(r"\s+", " ", text)
-    m = re.search(r"출판사\s*[:\-]?\s*([가-힣A-Za-z0-9·&()\-\s]{2,40})", t)
-    if not m:
+    - labels: 라벨 -> 라벨 끝 위치 목록
+    - won_runs: "원"이 뒤따르는 숫자 덩어리 (덩어리 시작, 첫 숫자 위치, 끝)
+    - isbns / publisher_at: ISBN-13 문자열, "출판사" 라벨 시작 위치
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.labels: dict[str, list[int]] = {}
+        self.won_runs: list[tuple[int, int, int]] = []
+        self.isbns: list[str] = []
+        self.publisher_at: list[int] = []
+        for m in _SCAN_TOKENS.finditer(text):
+            run, won, label = m.groups()
+            if label is not None:
+                if label == "출판사":
+                    self.publisher_at.append(m.start())
+                    continue
+                self.labels.setdefault(label, []).append(m.end())
+                if label == "할인가":
+                    self.labels.setdefault("할인", []).append(m.start() + 2)
+                continue
+            if len(run) >= 13:
+                self.isbns.extend(_ISBN13.findall(run))
+            if won is not None:
+                start = m.start()
+                self.won_runs.append((start, start + len(run) - len(run.lstrip(",")), m.end(1)))
+        self._won_digits = [r[1] for r in self.won_runs]
+        self._won_starts = [r[0] for r in self.won_runs]
+
+    def price_after(self, label: str, window: int = 60) -> Optional[int]:
+        """라벨 뒤 window자 안에서 처음 나오는 'N원' (기존 `라벨.{0,60}?(\d[\d,]*)\s*원`과 같은 결과)."""
+        for end in self.labels.get(label, ()):
+            i = bisect_left(self._won_digits, end)
+            if i < len(self.won_runs) and self._won_digits[i] - end <= window:
+                _, p, e = self.won_runs[i]
+                return _run_value(self.text[p:e])
         return None
-    v = m.group(1).strip()
-    v = re.split(r"(발행일|쪽수|정가|판매가|ISBN|저자|리뷰)", v)[0].strip()
-    return v[:40] if v else None
 
-def scan_prices_from_text(text: str) -> tuple[Optional[int], Optional[int]]:
-    t = re.sub(r"\s+", " ", text)
-    banned = ["배송비", "적립", "포인트", "쿠폰", "회원가", "최대", "혜택", "캐시", "마일리지", "적립금", "할인쿠폰"]
+    def price_right_after(self, label: str) -> Optional[int]:
+        """라벨 바로 뒤(공백만 허용)에 붙은 3자 이상 'N원' (`라벨\s*([0-9][0-9,]{2,})\s*원`)."""
+        for end in self.labels.get(label, ()):
+            i = bisect_left(self._won_starts, end)
+            if i >= len(self.won_runs):
+                continue
+            start, p, e = self.won_runs[i]
+            run = self.text[p:e]
+            if start == p and e - p >= 3 and run.isascii() and not self.text[end:start].strip():
+                return _run_value(run)
+        return None
+
+    def bare_prices(self, ascii_only: bool = False) -> Iterator[tuple[int, Optional[int]]]:
+        """라벨과 무관한 3자 이상 'N원' 후보들: (위치, 값). 문맥 분류는 context_class(위치)로."""
+        for _, p, e in self.won_runs:
+            run = self.text[p:e]
+            if ascii_only and not run.isascii():
+                # `[0-9][0-9,]{2,}\s*원`이라면 "원" 바로 앞의 ASCII 구간만 잡힌다
+                tail = _ASCII_TAIL.search(run)
+                if tail is None:
+                    continue
+                p, run = p + tail.start(), tail.group(0)
+            if e - p >= 3:
+                yield p, _run_value(run)
+
+    def context_class(self, pos: int) -> Optional[str]:
+        """가격 앞 25자의 문맥 분류(shipping/points/coupon/member/promo). 상품가로 보이면 None."""
+        m = _PRICE_CONTEXT.search(self.text, max(0, pos - 25), pos)
+        return PRICE_CONTEXT_CLASS[m.group(0)] if m else None
 
-    def pick_after(keyword: str) -> Optional[int]:
-        m = re.search(keyword + r".{0,60}?(\d[\d,]*)\s*원", t)
-        return parse_price(m.group(1)) if m else None
+    def publisher(self) -> Optional[str]:
+        for start in self.publisher_at:
+            m = _PUBLISHER_AT.match(self.text, start)
+            if m:
+                return m.group(1)
+        return None
 
-    list_price = pick_after("정가")
-    sale_price = pick_after("판매가") or pick_after("할인가") or pick_after("할인") or pick_after("판매 가격")
+def text_scan(src: PageOrText) -> TextScan:
+    if isinstance(src, ParsedPage):
+        return src.scan
+    return TextScan(_page_text(src))
+
+def scan_isbn(text: PageOrText) -> Optional[str]:
+    sc = text_scan(text)
+    return sc.isbns[0] if sc.isbns else None
+
+def scan_publisher(text: PageOrText) -> Optional[str]:
+    v = text_scan(text).publisher()
+    if v is None:
+        return None
+    v = v.strip()
+    v = _PUBLISHER_STOP.split(v)[0].strip()
+    return v[:40] if v else None
+
+def scan_prices_from_text(text: PageOrText) -> tuple[Optional[int], Optional[int]]:
+    sc = text_scan(text)
+    list_price = sc.price_after("정가")
+    sale_price = sc.price_after("판매가") or sc.price_after("할인가") or sc.price_after("할인") or sc.price_after("판매 가격")
 
     if sale_price is None:
-        for m in re.finditer(r"(\d[\d,]{2,})\s*원", t):
-            start = max(0, m.start() - 25)
-            ctx = t[start:m.start()]
-            if any(b in ctx for b in banned):
+        for pos, value in sc.bare_prices():
+            if sc.context_class(pos) is not None:
                 continue
-            sale_price = parse_price(m.group(1))
+            sale_price = value
             if sale_price:
                 break
 
     return list_price, sale_price
 
-def _walk(obj: Any, path: str="") -> list[tuple[str, Any]]:
-    items = []
-    if isinstance(obj, dict):
-        for k,v in obj.items():
-            p = f"{path}.{k}" if path else str(k)
-            items.append((p,v))
-            items.extend(_walk(v, p))
-    elif isinstance(obj, list):
-        for i,v in enumerate(obj):
-            p = f"{path}[{i}]"
-            items.append((p,v))
-            items.extend(_walk(v, p))
-    return items
-
-def extract_next_data_prices(html: str) -> tuple[Optional[int], Optional[int]]:
-    s = soup(html)
-    tag = s.find("script", id="__NEXT_DATA__")
-    if not tag:
-        return (None, None)
-    raw = tag.string or tag.get_text()
-    if not raw:
-        return (None, None)
-    try:
-        data = json.loads(raw)
-    except Exception:
+# __NEXT_DATA__ 경로 특징 비트. 경로(조상 키들)의 특징은 각 키 특징의 OR이라 키마다 한 번만 계산하면 된다.
+_ND_PRICE = 1       # 가격 후보 키 (keys_priority 중 하나)
+_ND_SALE = 2        # saleprice / sellprice / discount / final
+_ND_LIST = 4        # listprice / normalprice / origprice / standardprice
+_ND_NEG = 8         # benefit / point / delivery / coupon
+_ND_PICK_SALE = 16  # 판매가로 채택 가능한 경로
+_ND_PICK_LIST = 32  # 정가로 채택 가능한 경로
+_ND_SKIP = 64       # 리뷰/추천/배너 등 상품 가격과 무관한 하위 트리
+_ND_FEATURES = [
+    (_ND_PRICE, ["saleprice", "sellprice", "discountprice", "discountedprice", "finalprice", "purchaseprice",
+                 "price", "sellingprice", "currentprice", "normalprice", "listprice", "standardprice", "origprice"]),
+    (_ND_SALE, ["saleprice", "sellprice", "discount", "final"]),
+    (_ND_LIST, ["listprice", "normalprice", "origprice", "standardprice"]),
+    (_ND_NEG, ["benefit", "point", "delivery", "coupon"]),
+    (_ND_PICK_SALE, ["saleprice", "sellprice", "discount", "final", "purchaseprice", "sellingprice", "currentprice", "price"]),
+    (_ND_PICK_LIST, ["listprice", "normalprice", "origprice", "standardprice", "price"]),
+    (_ND_SKIP, ["review", "recommend", "banner", "advert"]),
+]
+_nd_key_cache: dict[str, int] = {}
+
+def _nd_key_flags(key: Any) -> int:
+    flags = _nd_key_cache.get(key)
+    if flags is None:
+        lk = str(key).lower()
+        flags = 0
+        for bit, words in _ND_FEATURES:
+            if any(w in lk for w in words):
+                flags |= bit
+        if len(_nd_key_cache) < 8192:
+            _nd_key_cache[key] = flags
+    return flags
+
+def _iter_next_data_prices(data: Any) -> Iterator[tuple[int, Any]]:
+    """가격 후보 경로 아래의 스칼라 값만 (경로 특징, 값)으로 순서대로 내보낸다. 경로 문자열은 만들지 않는다."""
+    stack = [(data, 0)]
+    while stack:
+        obj, flags = stack.pop()
+        if isinstance(obj, dict):
+            children = []
+            for k, v in obj.items():
+                f = flags | _nd_key_flags(k)
+                if f & _ND_SKIP:
+                    continue
+                if isinstance(v, (dict, list)) or (f & _ND_PRICE and isinstance(v, (int, float, str))):
+                    children.append((v, f))
+            stack.extend(reversed(children))
+        elif isinstance(obj, list):
+            stack.extend(reversed([(v, flags) for v in obj
+                                   if isinstance(v, (dict, list)) or (flags & _ND_PRICE and isinstance(v, (int, float, str)))]))
+        else:
+            yield flags, obj
+
+def extract_next_data_prices(html: Union[ParsedPage, str]) -> tuple[Optional[int], Optional[int]]:
+    page = html if isinstance(html, ParsedPage) else ParsedPage(html)
+    data = page.next_data
+    if data is None:
         return (None, None)
 
     candidates = []
-    keys_priority = [
-        "salePrice","sellPrice","discountPrice","discountedPrice","finalPrice","purchasePrice",
-        "price","sellingPrice","currentPrice","normalPrice","listPrice","standardPrice","origPrice"
-    ]
-    for p, v in _walk(data):
-        if not isinstance(v, (int, float, str)):
-            continue
-        lower_p = p.lower()
-        if not any(k.lower() in lower_p for k in keys_priority):
-            continue
+    for flags, v in _iter_next_data_prices(data):
         val = int(v) if isinstance(v, (int, float)) else parse_price(v)
         if val is None:
             continue
-        if 500 <= val <= 500000:
-            candidates.append((p, val))
+        # 배송비/적립금/쿠폰 같은 혜택 금액은 상품 가격 후보가 아니다
+        if 500 <= val <= 500000 and not flags & _ND_NEG:
+            candidates.append((flags, val))
 
     if not candidates:
         return (None, None)
 
-    def score(path: str, val: int) -> int:
-        lp = path.lower()
+    def score(flags: int, val: int) -> int:
         s = 0
-        if "saleprice" in lp or "sellprice" in lp or "discount" in lp or "final" in lp:
+        if flags & _ND_SALE:
             s += 4
-        if "listprice" in lp or "normalprice" in lp or "origprice" in lp or "standardprice" in lp:
+        if flags & _ND_LIST:
             s += 3
-        if "benefit" in lp or "point" in lp or "delivery" in lp or "coupon" in lp:
-            s -= 10
         if val <= 6000:
             s -= 2
         return s
@@ -184,11 +586,10 @@ def extract_next_data_prices(html: str) -> tuple[Optional[int], Optional[int]]:
 
     sale_price = None
     list_price = None
-    for p, v in ranked:
-        lp = p.lower()
-        if sale_price is None and any(k in lp for k in ["saleprice","sellprice","discount","final","purchaseprice","sellingprice","currentprice","price"]):
+    for flags, v in ranked:
+        if sale_price is None and flags & _ND_PICK_SALE:
             sale_price = v
-        if list_price is None and any(k in lp for k in ["listprice","normalprice","origprice","standardprice","price"]):
+        if list_price is None and flags & _ND_PICK_LIST:
             list_price = v
         if sale_price is not None and list_price is not None:
             break
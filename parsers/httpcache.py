@@ -0,0 +1,155 @@
+import os, sqlite3, threading, time
+from typing import NamedTuple, Optional
+from urllib.parse import urlparse
+
+# 사이트별 응답 캐시 유효기간(초). 기간이 지나도 ETag/Last-Modified가 있으면 조건부 요청으로 재검증한다.
+SITE_TTL = {
+    "kyobobook.co.kr": 3600,
+    "yes24.com": 3600,
+    "aladin.co.kr": 3600,
+    "ypbooks.co.kr": 3600,
+    "duckduckgo.com": 6 * 3600,
+}
+DEFAULT_TTL = 1800
+DEFAULT_MAX_MB = 256
+
+class CachedPage(NamedTuple):
+    final_url: str
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+
+class ResponseCache:
+    """최종 URL을 키로 HTML 응답을 SQLite 파일에 저장하는 캐시. 용량을 넘으면 오래 안 쓴 것부터 지운다."""
+
+    def __init__(self, path: str, max_mb: int = DEFAULT_MAX_MB, ttl: Optional[dict] = None):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl = dict(SITE_TTL)
+        self.ttl.update(ttl or {})
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, body TEXT, etag TEXT, "
+            "last_modified TEXT, stored_at REAL, accessed_at REAL, size INTEGER)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS aliases (request_url TEXT PRIMARY KEY, final_url TEXT)")
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def ttl_for(self, url: str) -> int:
+        host = (urlparse(url).hostname or "").lower()
+        for suffix, ttl in self.ttl.items():
+            if host == suffix or host.endswith("." + suffix):
+                return ttl
+        return DEFAULT_TTL
+
+    def lookup(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT r.url, r.body, r.etag, r.last_modified, r.stored_at FROM responses r "
+                "WHERE r.url = ? OR r.url = (SELECT final_url FROM aliases WHERE request_url = ?) LIMIT 1",
+                (url, url)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            final_url, body, etag, last_modified, stored_at = row
+            fresh = time.time() - stored_at < self.ttl_for(final_url)
+            if fresh:
+                self.stats["hits"] += 1
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), final_url))
+            elif not (etag or last_modified):
+                self.stats["misses"] += 1
+                return None
+            return CachedPage(final_url, body, etag, last_modified, fresh)
+
+    def revalidated(self, final_url: str) -> None:
+        """304 응답을 받았을 때 저장 시각을 갱신한다."""
+        now = time.time()
+        with self._lock:
+            self.stats["revalidated"] += 1
+            self._conn.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?", (now, now, final_url))
+
+    def store(self, request_url: str, final_url: str, body: str,
+              etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        size = len(body.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE url = ?", (final_url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (final_url, body, etag, last_modified, now, now, size))
+            if request_url != final_url:
+                self._conn.execute("INSERT OR REPLACE INTO aliases VALUES (?, ?)", (request_url, final_url))
+            self._size += size - (old[0] if old else 0)
+            self.stats["stores"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes:
+            victims = self._conn.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at LIMIT 32").fetchall()
+            if not victims:
+                self._size = 0
+                break
+            for url, size in victims:
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._conn.execute("DELETE FROM aliases WHERE final_url = ?", (url,))
+                self._size -= size
+                self.stats["evictions"] += 1
+                if self._size <= self.max_bytes:
+                    break
+
+    def size_bytes(self) -> int:
+        """저장된 본문 크기 합(바이트). 용량 상한(max_bytes)과 비교하는 값이다."""
+        with self._lock:
+            return self._size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM aliases")
+            self._size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+_cache_checked = False
+
+def configure_http_cache(path: Optional[str], max_mb: int = DEFAULT_MAX_MB, ttl: Optional[dict] = None) -> Optional[ResponseCache]:
+    """응답 캐시를 켠다(path=None이면 끈다). 환경변수 BOOK_HTTP_CACHE로도 경로를 지정할 수 있다."""
+    global _cache, _cache_checked
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = ResponseCache(path, max_mb=max_mb, ttl=ttl) if path else None
+        _cache_checked = True
+        return _cache
+
+def get_http_cache() -> Optional[ResponseCache]:
+    global _cache, _cache_checked
+    if not _cache_checked:
+        with _cache_lock:
+            if not _cache_checked:
+                path = os.environ.get("BOOK_HTTP_CACHE")
+                if path:
+                    _cache = ResponseCache(path)
+                _cache_checked = True
+    return _cache
+
+def http_cache_stats() -> dict:
+    """응답 캐시 적중/재검증/미스/저장/축출 횟수와 저장 용량(bytes). 캐시가 꺼져 있으면 빈 dict."""
+    cache = get_http_cache()
+    if cache is None:
+        return {}
+    stats = dict(cache.stats)
+    stats["bytes"] = cache.size_bytes()
+    stats["max_bytes"] = cache.max_bytes
+    return stats
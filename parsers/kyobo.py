@@ -1,34 +1,36 @@
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import quote_plus
 from bs4 import BeautifulSoup
 from .common import (
-    fetch_html, soup, extract_jsonld, pick_booklike, parse_price,
-    scan_prices_from_text, scan_isbn, scan_publisher, extract_next_data_prices
+    PRICE_HTML, PRICE_RENDER, PRICE_SEARCH, ParsedPage, fetch_page, http_get, parse_price, record_fastpath,
+    scan_prices_from_text, scan_isbn, scan_publisher, extract_next_data_prices, text_scan
 )
+from .bibcache import fill_bibliographic
+from .timing import bind, count, stage
 try:
     from .render import extract_kyobo_prices_playwright
 except Exception:
     extract_kyobo_prices_playwright = None
 
+DDG_SEARCH_URL = "https://html.duckduckgo.com/html/?q="
+KYOBO_SEARCH_URL = "https://search.kyobobook.co.kr/search?keyword="
+SEARCH_HEADERS = {"User-Agent": "Mozilla/5.0", "Accept-Language": "ko-KR,ko;q=0.9,en;q=0.8"}
+
+# 검색 보조 요청을 동시에 보내기 위한 공용 스레드 풀
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="kyobo-search")
+
 def _clean(v):
     if v is None:
         return None
     v = re.sub(r"\s+", " ", str(v)).strip()
     return v or None
 
-def _meta_content(s: BeautifulSoup, *, prop=None, name=None):
-    if prop:
-        tag = s.find("meta", property=prop)
-        if tag and tag.get("content"):
-            return _clean(tag.get("content"))
-    if name:
-        tag = s.find("meta", attrs={"name": name})
-        if tag and tag.get("content"):
-            return _clean(tag.get("content"))
-    return None
+def _meta_content(page: ParsedPage, *, prop=None, name=None):
+    return _clean(page.meta_content(prop=prop, name=name))
 
-def _extract_title(s: BeautifulSoup, text: str):
-    title = _meta_content(s, prop="og:title") or _meta_content(s, name="title")
+def _extract_title(page: ParsedPage):
+    title = _meta_content(page, prop="og:title") or _meta_content(page, name="title")
     if title:
         title = re.sub(r"\s*\|\s*교보문고\s*$", "", title).strip()
         title = re.sub(r"\s*-\s*교보문고\s*$", "", title).strip()
@@ -36,14 +38,14 @@ def _extract_title(s: BeautifulSoup, text: str):
             return title
     for sel in ["h1", "title", "meta[property='twitter:title']"]:
         try:
-            tag = s.select_one(sel)
+            tag = page.soup.select_one(sel)
             if tag:
                 v = _clean(tag.get("content")) if tag.name == "meta" else _clean(tag.get_text(" ", strip=True))
                 if v and "국내도서 메인" not in v:
                     return re.sub(r"\s*\|\s*교보문고\s*$", "", v).strip()
         except Exception:
             pass
-    m = re.search(r"^\s*([^|\n]{2,120})\s*[|｜]\s*교보문고", text)
+    m = re.search(r"^\s*([^|\n]{2,120})\s*[|｜]\s*교보문고", page.text)
     return _clean(m.group(1)) if m else None
 
 def _extract_author(text: str):
@@ -56,22 +58,26 @@ def _extract_author(text: str):
             return _clean(m.group(1))
     return None
 
-def _extract_publisher(text: str):
-    for pat in [
-        r"출판사\s*[:\-]?\s*([가-힣A-Za-z0-9·&().,\- ]{2,50})",
-        r"([가-힣A-Za-z0-9·&().,\- ]{2,50})\s*·\s*\d{4}년\s*\d{1,2}월",
-    ]:
-        m = re.search(pat, text)
-        if m:
-            v = _clean(m.group(1))
-            if v and v not in {"저자", "작가정보"}:
-                return v
+_PUBLISHER_LABEL = re.compile(r"출판사\s*[:\-]?\s*([가-힣A-Za-z0-9·&().,\- ]{2,50})")
+_PUBLISHER_BEFORE_DATE = re.compile(r"([가-힣A-Za-z0-9·&().,\- ]{2,50})\s*·\s*\d{4}년\s*\d{1,2}월")
+
+def _extract_publisher(text):
+    sc = text_scan(text)
+    # "출판사" 라벨 위치는 본문 스캔에서 이미 알고 있으므로 그 자리에서만 맞춰 본다
+    m = next(filter(None, (_PUBLISHER_LABEL.match(sc.text, start) for start in sc.publisher_at)), None)
+    v = _clean(m.group(1)) if m else None
+    if v and v not in {"저자", "작가정보"}:
+        return v
+    m = _PUBLISHER_BEFORE_DATE.search(sc.text)
+    v = _clean(m.group(1)) if m else None
+    if v and v not in {"저자", "작가정보"}:
+        return v
     return None
 
-def _extract_prices_from_meta(s: BeautifulSoup):
+def _extract_prices_from_meta(page: ParsedPage):
     vals = []
     for prop in ["product:price:amount", "og:price:amount"]:
-        v = _meta_content(s, prop=prop)
+        v = _meta_content(page, prop=prop)
         p = parse_price(v)
         if p:
             vals.append(p)
@@ -110,25 +116,26 @@ def _extract_prices_by_dom(s: BeautifulSoup):
     ])
     return list_price, sale_price
 
-def _extract_prices_by_labels(text: str):
-    t = re.sub(r"\s+", " ", text)
+_FINAL_SALE = re.compile(r"최종\s*판매가\s*([0-9][0-9,]{2,})\s*원")
+
+def _extract_prices_by_labels(text):
+    sc = text_scan(text)
     list_price = None
     sale_price = None
-    for pat, kind in [
-        (r"정가\s*([0-9][0-9,]{2,})\s*원", "list"),
-        (r"판매가\s*([0-9][0-9,]{2,})\s*원", "sale"),
-        (r"할인가\s*([0-9][0-9,]{2,})\s*원", "sale"),
-        (r"최종\s*판매가\s*([0-9][0-9,]{2,})\s*원", "sale"),
-    ]:
-        m = re.search(pat, t)
-        if m:
-            v = parse_price(m.group(1))
-            if v:
-                if kind == "list" and list_price is None:
-                    list_price = v
-                if kind == "sale" and sale_price is None:
-                    sale_price = v
-    nums = [parse_price(x) for x in re.findall(r"([0-9][0-9,]{2,})\s*원", t)]
+    for label, kind in [("정가", "list"), ("판매가", "sale"), ("할인가", "sale")]:
+        v = sc.price_right_after(label)
+        if v:
+            if kind == "list" and list_price is None:
+                list_price = v
+            if kind == "sale" and sale_price is None:
+                sale_price = v
+    # "최종 판매가 N원"은 "판매가 N원"에도 걸리므로, 판매가가 0원으로 읽힌 드문 경우에만 따로 본다
+    if sale_price is None and "판매가" in sc.labels:
+        m = _FINAL_SALE.search(sc.text)
+        v = parse_price(m.group(1)) if m else None
+        if v:
+            sale_price = v
+    nums = [v for _, v in sc.bare_prices(ascii_only=True)]
     nums = [n for n in nums if n and 5000 <= n <= 500000]
     if nums:
         if sale_price is None:
@@ -137,18 +144,29 @@ def _extract_prices_by_labels(text: str):
             list_price = max(nums)
     return list_price, sale_price
 
-def _extract_prices_from_any_text(text: str):
-    t = re.sub(r"\s+", " ", text)
-    nums = [parse_price(x) for x in re.findall(r"([0-9][0-9,]{2,})\s*원", t)]
+def _extract_prices_from_any_text(text):
+    nums = [v for _, v in text_scan(text).bare_prices(ascii_only=True)]
     nums = [n for n in nums if n and 5000 <= n <= 500000]
     if not nums:
         return None, None
     return max(nums), min(nums)
 
-def _parse_from_html(final_url: str, html: str, product_id: str | None):
-    s = soup(html)
-    text = re.sub(r"\s+", " ", s.get_text(" ", strip=True))
-    book = pick_booklike(extract_jsonld(s)) or {}
+SOLD_OUT_NOTE = "품절"
+# __NEXT_DATA__ props.pageProps.product.saleStatus 중 판매하지 않는 상태
+_SOLD_OUT_STATUSES = {"SOLD_OUT", "OUT_OF_PRINT"}
+
+def _is_sold_out(page: ParsedPage) -> bool:
+    """품절/절판 페이지인지. 이런 페이지의 가격 영역 밖 숫자(추천 도서, 배송비 등)는 상품 가격이 아니다."""
+    nd = page.next_data
+    product = nd.get("props", {}).get("pageProps", {}).get("product") if isinstance(nd, dict) else None
+    if isinstance(product, dict) and str(product.get("saleStatus") or "").upper() in _SOLD_OUT_STATUSES:
+        return True
+    return page.soup.select_one(".prod_price_box .sold_out") is not None
+
+def parse_from_html(final_url: str, html: str, product_id: str | None):
+    """이미 받아 둔 상품 페이지 HTML에서 행을 만든다(요청/검색 보조 없음)."""
+    page = ParsedPage(html, final_url)
+    book = page.book
 
     title = _clean(book.get("name")) if isinstance(book, dict) else None
     isbn = _clean(book.get("isbn") or book.get("ISBN")) if isinstance(book, dict) else None
@@ -184,38 +202,44 @@ def _parse_from_html(final_url: str, html: str, product_id: str | None):
             list_price = offer_price
             sale_price = offer_price
 
-    title = title or _extract_title(s, text)
-    isbn = isbn or scan_isbn(text)
-    author = author or _extract_author(text)
-    publisher = publisher or _extract_publisher(text) or scan_publisher(text)
+    title = title or _extract_title(page)
+    isbn = isbn or scan_isbn(page)
+    author = author or _extract_author(page.text)
+    publisher = publisher or _extract_publisher(page) or scan_publisher(page)
 
-    nd_list, nd_sale = extract_next_data_prices(html)
+    nd_list, nd_sale = extract_next_data_prices(page)
     if nd_list is not None:
         list_price = nd_list
     if nd_sale is not None:
         sale_price = nd_sale
 
-    dom_list, dom_sale = _extract_prices_by_dom(s)
-    if list_price is None and dom_list is not None:
-        list_price = dom_list
-    if sale_price is None and dom_sale is not None:
-        sale_price = dom_sale
-
-    if list_price is None and sale_price is None:
-        meta_list, meta_sale = _extract_prices_from_meta(s)
-        list_price = list_price or meta_list
-        sale_price = sale_price or meta_sale
-
-    label_list, label_sale = _extract_prices_by_labels(text)
-    if list_price is None and label_list is not None:
-        list_price = label_list
-    if sale_price is None and label_sale is not None:
-        sale_price = label_sale
-
-    if list_price is None or sale_price is None:
-        txt_list, txt_sale = scan_prices_from_text(text)
-        list_price = list_price or txt_list
-        sale_price = sale_price or txt_sale
+    # 아래 보조 추출기는 값이 비어 있을 때만 돌려 DOM/텍스트 생성을 피한다.
+    # 품절이면 가격 영역이 비어 있어 보조 추출기가 추천 도서 등 엉뚱한 가격을 집으므로 아예 돌리지 않는다.
+    sold_out = (list_price is None or sale_price is None) and _is_sold_out(page)
+    if not sold_out:
+        if list_price is None or sale_price is None:
+            dom_list, dom_sale = _extract_prices_by_dom(page.soup)
+            if list_price is None and dom_list is not None:
+                list_price = dom_list
+            if sale_price is None and dom_sale is not None:
+                sale_price = dom_sale
+
+        if list_price is None and sale_price is None:
+            meta_list, meta_sale = _extract_prices_from_meta(page)
+            list_price = list_price or meta_list
+            sale_price = sale_price or meta_sale
+
+        if list_price is None or sale_price is None:
+            label_list, label_sale = _extract_prices_by_labels(page)
+            if list_price is None and label_list is not None:
+                list_price = label_list
+            if sale_price is None and label_sale is not None:
+                sale_price = label_sale
+
+        if list_price is None or sale_price is None:
+            txt_list, txt_sale = scan_prices_from_text(page)
+            list_price = list_price or txt_list
+            sale_price = sale_price or txt_sale
 
     if sale_price is not None and list_price is None:
         list_price = sale_price
@@ -235,7 +259,11 @@ def _parse_from_html(final_url: str, html: str, product_id: str | None):
         "sale_price": sale_price,
         "error": None,
         "parse_mode": "requests",
+        "price_source": PRICE_HTML if list_price is not None or sale_price is not None else None,
     }
+    if sold_out:
+        row["note"] = SOLD_OUT_NOTE
+    record_fastpath("KYobo", page)
     return row
 
 def _score(row):
@@ -244,7 +272,8 @@ def _score(row):
         score += 2
     return score
 
-def _suspicious_price(v):
+def suspicious_price(v):
+    """교보 가격이 배송비/적립금 같은 엉뚱한 값일 수 있는지(없거나 6,000원 이하)."""
     if v is None:
         return True
     try:
@@ -252,53 +281,62 @@ def _suspicious_price(v):
     except Exception:
         return False
 
+_EMPTY_GUESS = {"title": None, "author": None, "list_price": None, "sale_price": None}
+_TITLE_PATTERNS = [re.compile(r"『([^』]{2,120})』"), re.compile(r"“([^”]{2,120})”"), re.compile(r'"([^"]{2,120})"')]
+_GUESS_AUTHOR = re.compile(r"([가-힣A-Za-z0-9·&().,\- ]{2,40})\s*(?:저서|저자\(글\)|지음)")
+
+def _ddg_query(q: str):
+    try:
+        resp = http_get(DDG_SEARCH_URL + quote_plus(q), timeout=20, headers=SEARCH_HEADERS)
+        if resp.status_code != 200:
+            return None
+        text = ParsedPage(resp.text).text
+        title = None
+        for pat in _TITLE_PATTERNS:
+            m = pat.search(text)
+            if m:
+                cand = _clean(m.group(1))
+                if cand and "교보문고" not in cand and len(cand) >= 2:
+                    title = cand
+                    break
+        author = None
+        m = _GUESS_AUTHOR.search(text)
+        if m:
+            author = _clean(m.group(1))
+        list_price, sale_price = _extract_prices_from_any_text(text)
+        if title or author or list_price or sale_price:
+            return {"title": title, "author": author, "list_price": list_price, "sale_price": sale_price}
+    except Exception:
+        pass
+    return None
+
 def _search_engine_guess(url: str, product_id: str | None):
-    import requests
+    """후보 질의를 동시에 보내고, 쓸 만한 답이 가장 먼저 온 것을 채택."""
     queries = [
         f'"{url}"',
         f'"{product_id}" 교보문고' if product_id else "",
         f'교보문고 "{product_id}" 가격' if product_id else "",
         f'"{product_id}"' if product_id else "",
     ]
-    patterns_title = [r"『([^』]{2,120})』", r"“([^”]{2,120})”", r'"([^"]{2,120})"']
-    author_pat = r"([가-힣A-Za-z0-9·&().,\- ]{2,40})\s*(?:저서|저자\(글\)|지음)"
-    for q in queries:
-        if not q:
-            continue
-        try:
-            search_url = "https://html.duckduckgo.com/html/?q=" + quote_plus(q)
-            resp = requests.get(search_url, timeout=20, headers={"User-Agent":"Mozilla/5.0","Accept-Language":"ko-KR,ko;q=0.9,en;q=0.8"})
-            if resp.status_code != 200:
-                continue
-            text = re.sub(r"\s+", " ", BeautifulSoup(resp.text, "lxml").get_text(" ", strip=True))
-            title = None
-            for pat in patterns_title:
-                m = re.search(pat, text)
-                if m:
-                    cand = _clean(m.group(1))
-                    if cand and "교보문고" not in cand and len(cand) >= 2:
-                        title = cand
-                        break
-            author = None
-            m = re.search(author_pat, text)
-            if m:
-                author = _clean(m.group(1))
-            list_price, sale_price = _extract_prices_from_any_text(text)
-            if title or author or list_price or sale_price:
-                return {"title": title, "author": author, "list_price": list_price, "sale_price": sale_price}
-        except Exception:
-            continue
-    return {"title": None, "author": None, "list_price": None, "sale_price": None}
+    futures = [_SEARCH_POOL.submit(_ddg_query, q) for q in queries if q]
+    try:
+        for fut in as_completed(futures):
+            res = fut.result()
+            if res:
+                return res
+    finally:
+        for fut in futures:
+            fut.cancel()
+    return dict(_EMPTY_GUESS)
 
 def _search_kyobo_by_keyword(keyword: str, product_id: str | None = None):
-    import requests
     if not keyword:
         return {}
     try:
-        search_url = "https://search.kyobobook.co.kr/search?keyword=" + quote_plus(keyword)
-        resp = requests.get(search_url, timeout=20, headers={"User-Agent":"Mozilla/5.0","Accept-Language":"ko-KR,ko;q=0.9,en;q=0.8"})
+        resp = http_get(KYOBO_SEARCH_URL + quote_plus(keyword), timeout=20, headers=SEARCH_HEADERS)
         resp.raise_for_status()
-        s = BeautifulSoup(resp.text, "lxml")
+        page = ParsedPage(resp.text)
+        s = page.soup
 
         target = None
         for a in s.select('a[href*="/detail/"], a[href*="product.kyobobook.co.kr/detail"]'):
@@ -325,7 +363,7 @@ def _search_kyobo_by_keyword(keyword: str, product_id: str | None = None):
                 if len(block_text) >= 120:
                     break
 
-        text = block_text or re.sub(r"\s+", " ", s.get_text(" ", strip=True))
+        text = block_text or page.text
         author = None
         publisher = None
         m = re.search(r"([가-힣A-Za-z0-9·&().,\- ]{2,40})\s*저자\(글\)", text)
@@ -339,40 +377,80 @@ def _search_kyobo_by_keyword(keyword: str, product_id: str | None = None):
     except Exception:
         return {}
 
+def _plan_fallback(row) -> set:
+    """검색 보조가 필요한 이유. 검색으로 채울 수 있는 필드가 비었거나 가격이 의심스러울 때만 채워진다."""
+    need = {k for k in ["title", "author", "publisher"] if not row.get(k)}
+    # 품절 도서는 가격이 없는 게 맞다(검색 결과의 가격으로 채우지 않는다)
+    if row.get("note") != SOLD_OUT_NOTE and suspicious_price(row.get("sale_price") or row.get("list_price")):
+        need.add("price")
+    return need
+
+def run_search_fallbacks(url: str, product_id: str | None, need: set):
+    """교보 검색(상품 ID)과 DuckDuckGo 추측을 동시에 돌려 (추측, 검색 결과 행)을 돌려준다.
+    need는 _plan_fallback이 고른 필드 집합이다. DuckDuckGo는 출판사를 주지 않는다."""
+    def search_by_id():
+        with stage("search_kyobo"):
+            return _search_kyobo_by_keyword(product_id or "", product_id)
+
+    by_id = _SEARCH_POOL.submit(bind(search_by_id))
+    with stage("search_ddg"):
+        guess = _search_engine_guess(url, product_id) if need & {"title", "author", "price"} else dict(_EMPTY_GUESS)
+    search_row = by_id.result()
+    if guess.get("title") and not search_row.get("title"):
+        with stage("search_title"):
+            search_row = _search_kyobo_by_keyword(guess["title"], product_id=product_id)
+    return guess, search_row
+
 def parse_kyobo(url: str):
-    m = re.search(r"/detail/([A-Z0-9]+)", url)
-    product_id = m.group(1) if m else None
-
-    final_url, html = fetch_html(url)
-    row = _parse_from_html(final_url, html, product_id)
-
-    # 검색 fallback으로 가격 먼저 보강
-    guess = _search_engine_guess(url, product_id)
-    search_row = _search_kyobo_by_keyword(guess.get("title") or product_id or "", product_id=product_id)
-
-    improved = dict(row)
-    for key in ["title", "author", "list_price", "sale_price"]:
-        if guess.get(key) and not improved.get(key):
-            improved[key] = guess.get(key)
-    for key in ["title", "author", "publisher", "list_price", "sale_price"]:
-        if search_row.get(key) and not improved.get(key):
-            improved[key] = search_row.get(key)
-
-    if improved.get("sale_price") and not improved.get("list_price"):
-        improved["list_price"] = improved["sale_price"]
-    if improved.get("list_price") and not improved.get("sale_price"):
-        improved["sale_price"] = improved["list_price"]
-
-    if _score(improved) > _score(row) or ((improved.get("sale_price") or improved.get("list_price")) and _suspicious_price(row.get("sale_price") or row.get("list_price"))):
-        improved["status"] = "success"
-        improved["parse_mode"] = "search-fallback"
-        improved["error"] = None
-        row = improved
+    # router.canonical_key와 같은 규칙: 대소문자 구분 없이 찾고 대문자로 맞춘다
+    m = re.search(r"/detail/([A-Za-z0-9]+)", url)
+    product_id = m.group(1).upper() if m else None
+
+    fetched = fetch_page(url, revalidate=False)
+    with stage("parse"):
+        row = parse_from_html(fetched.final_url, fetched.html, product_id)
+    # 가격 새로고침(refresh.py)이 첫 회부터 조건부 요청을 보낼 수 있게 남긴다
+    row["validators"] = fetched.validators
+
+    # ISBN을 이미 아는 책이면 서지 필드는 캐시로 채운다. 그러면 검색은 가격 때문일 때만 돈다.
+    if fill_bibliographic(row):
+        count("bib_fill")
+
+    # 비어 있는 필드나 의심 가격이 있을 때만 검색 fallback으로 보강
+    need = _plan_fallback(row)
+    if need:
+        with stage("search"):
+            guess, search_row = run_search_fallbacks(url, product_id, need)
+
+        improved = dict(row)
+        # 가격은 need에 있을 때만 채운다(품절 도서의 빈 가격은 그대로 둔다)
+        prices = ["list_price", "sale_price"] if "price" in need else []
+        for key in ["title", "author", *prices]:
+            if guess.get(key) and not improved.get(key):
+                improved[key] = guess.get(key)
+        for key in ["title", "author", "publisher", *prices]:
+            if search_row.get(key) and not improved.get(key):
+                improved[key] = search_row.get(key)
+
+        if improved.get("sale_price") and not improved.get("list_price"):
+            improved["list_price"] = improved["sale_price"]
+        if improved.get("list_price") and not improved.get("sale_price"):
+            improved["sale_price"] = improved["list_price"]
+
+        if _score(improved) > _score(row) or ((improved.get("sale_price") or improved.get("list_price")) and suspicious_price(row.get("sale_price") or row.get("list_price"))):
+            if (improved.get("list_price"), improved.get("sale_price")) != (row.get("list_price"), row.get("sale_price")):
+                improved["price_source"] = PRICE_SEARCH
+            improved["status"] = "success"
+            improved["parse_mode"] = "search-fallback"
+            improved["error"] = None
+            row = improved
 
     # 그래도 가격이 없을 때만 playwright 시도
-    if extract_kyobo_prices_playwright is not None and row.get("sale_price") is None and row.get("list_price") is None:
+    if (extract_kyobo_prices_playwright is not None and row.get("note") != SOLD_OUT_NOTE
+            and row.get("sale_price") is None and row.get("list_price") is None):
         try:
-            final_url2, html2, list2, sale2 = extract_kyobo_prices_playwright(url)
+            with stage("render"):
+                final_url2, html2, list2, sale2 = extract_kyobo_prices_playwright(url)
             if list2 is not None:
                 row["list_price"] = list2
             if sale2 is not None:
@@ -383,6 +461,7 @@ def parse_kyobo(url: str):
                 row["sale_price"] = row["list_price"]
             if row.get("sale_price") or row.get("list_price"):
                 row["parse_mode"] = "playwright"
+                row["price_source"] = PRICE_RENDER
         except Exception:
             pass
 
@@ -0,0 +1,138 @@
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from . import aladin, kyobo, yes24, ypbooks
+from .common import PRICE_HTML, PRICE_RENDER, PRICE_SEARCH, fetch_page
+from .render import fetch_html_playwright
+from .resultcache import get_result_cache
+from .router import canonical_key, detect_site, run_per_host
+from .timing import recording, stage
+
+# 서점별로 가격을 얻는 경로(싼 순서). 새로고침은 지난번 price_source부터 시도하고, 안 되면 나머지를 이 순서로.
+PRICE_LADDER = {
+    "KYobo": (PRICE_HTML, PRICE_SEARCH, PRICE_RENDER),
+    "YES24": (PRICE_HTML, PRICE_RENDER),
+    "ALADIN": (PRICE_HTML, PRICE_RENDER),
+    "YPBOOKS": (PRICE_HTML, PRICE_RENDER),
+}
+_HTML_PARSERS = {
+    "KYobo": kyobo.parse_from_html,
+    "YES24": yes24.parse_from_html,
+    "ALADIN": aladin.parse_from_html,
+    "YPBOOKS": ypbooks.parse_from_html,
+}
+
+Prices = Tuple[Optional[int], Optional[int]]
+
+def _from_html(site: str, row: dict, new: dict, report: dict) -> Optional[Prices]:
+    page = fetch_page(row["url"], validators=row.get("validators"))
+    if page.validators:
+        new["validators"] = page.validators
+    if page.not_modified and not page.html:
+        report["not_modified"] = True
+        # 본문이 그대로라 HTML에서 얻었던 가격(과 품절 여부)도 그대로다. 검색/브라우저로 얻은 가격은 여기서 확인할 수 없다.
+        report["sold_out"] = row.get("note") == kyobo.SOLD_OUT_NOTE
+        if row.get("price_source") != PRICE_HTML:
+            return None
+        return row.get("list_price"), row.get("sale_price")
+    report["not_modified"] = page.not_modified
+    with stage("parse"):
+        parsed = _HTML_PARSERS[site](page.final_url, page.html, row.get("product_id"))
+    # 품절 표시는 교보 파서만 단다. 다시 팔기 시작했으면 비고의 품절도 지운다.
+    report["sold_out"] = parsed.get("note") == kyobo.SOLD_OUT_NOTE
+    if report["sold_out"]:
+        new["note"] = kyobo.SOLD_OUT_NOTE
+    elif new.get("note") == kyobo.SOLD_OUT_NOTE:
+        new["note"] = None
+    return parsed.get("list_price"), parsed.get("sale_price")
+
+def _from_search(site: str, row: dict, new: dict, report: dict) -> Optional[Prices]:
+    key = canonical_key(row["url"])
+    with stage("search"):
+        guess, search_row = kyobo.run_search_fallbacks(row["url"], key[1] if key else None, {"price"})
+    for found in (guess, search_row):
+        if found.get("list_price") or found.get("sale_price"):
+            return found.get("list_price"), found.get("sale_price")
+    return None
+
+def _from_render(site: str, row: dict, new: dict, report: dict) -> Optional[Prices]:
+    if site == "KYobo":
+        if kyobo.extract_kyobo_prices_playwright is None:
+            return None
+        with stage("render"):
+            _, _, list_price, sale_price = kyobo.extract_kyobo_prices_playwright(row["url"])
+        return list_price, sale_price
+    with stage("render"):
+        final_url, html = fetch_html_playwright(row["url"])
+    with stage("parse"):
+        parsed = _HTML_PARSERS[site](final_url, html, row.get("product_id"))
+    return parsed.get("list_price"), parsed.get("sale_price")
+
+_STEPS = {PRICE_HTML: _from_html, PRICE_SEARCH: _from_search, PRICE_RENDER: _from_render}
+
+def refresh_price(row: dict) -> Tuple[dict, dict]:
+    """이미 가져온 행의 정가/판매가만 다시 확인한다. (새 행, 변경 보고)를 돌려준다.
+
+    도서명/저자/출판사/ISBN 같은 서지 필드와 처리상태는 그대로 두고, 가격을 못 얻으면 기존 가격을 유지한다.
+    보고(report)의 changed는 가격이 바뀌었는지, not_modified는 서버가 304로 답했는지,
+    sold_out은 상품 페이지가 품절이라 가격을 비웠는지(검색/브라우저로 채우지 않는다)를 뜻한다.
+    """
+    site = detect_site(row.get("url") or "")
+    new = dict(row)
+    old = (row.get("list_price"), row.get("sale_price"))
+    report = {"url": row.get("url"), "site": site, "title": row.get("title"), "old": old, "new": old,
+              "source": None, "changed": False, "not_modified": False, "sold_out": False, "error": None}
+    ladder = PRICE_LADDER.get(site)
+    if ladder is None or row.get("status") != "success":
+        report["error"] = "가격을 새로고침할 수 없는 행입니다(지원하지 않는 서점이거나 이전 처리 실패)."
+        return new, report
+
+    last = row.get("price_source")
+    order = ([last] if last in ladder else []) + [s for s in ladder if s != last]
+    with recording() as timer:
+        t0 = time.perf_counter()
+        found = suspect = None
+        # 가격이 하나라도 나온 첫 경로의 값을 쓴다. 교보는 전체 파싱처럼 의심 가격이면 다음 경로로 더 확인하고,
+        # 끝까지 나은 값이 없을 때만 그 의심 가격을 쓴다.
+        for source in order:
+            try:
+                prices = _STEPS[source](site, row, new, report)
+            except Exception as e:
+                report["error"] = f"{source}: {type(e).__name__}: {e}"
+                continue
+            if report["sold_out"]:
+                found = (source, (None, None))
+                break
+            if prices is not None and (prices[0] is not None or prices[1] is not None):
+                if site == "KYobo":
+                    prices = (prices[0] if prices[0] is not None else prices[1],
+                              prices[1] if prices[1] is not None else prices[0])
+                    if kyobo.suspicious_price(prices[1] or prices[0]):
+                        suspect = suspect or (source, prices)
+                        continue
+                found = (source, prices)
+                break
+        found = found or suspect
+        timer.add("total", (time.perf_counter() - t0) * 1000)
+
+    new["timings"] = timer.as_dict()
+    if found is None:
+        report["error"] = report["error"] or "가격을 찾지 못해 기존 가격을 유지합니다."
+        return new, report
+    source, prices = found
+    new["list_price"], new["sale_price"] = prices
+    new["price_source"] = source
+    report.update(new=prices, source=source, changed=prices != old, error=None)
+
+    key = canonical_key(new.get("url") or "")
+    cache = get_result_cache() if key else None
+    if cache is not None:
+        cache.put(key, new)
+    return new, report
+
+def refresh_prices(rows: Iterable[dict], max_workers: int = 8,
+                   host_limits: Optional[Dict[str, int]] = None) -> Iterator[Tuple[int, dict, dict]]:
+    """행들의 가격을 동시에 새로고침하고, 끝나는 순서대로 (입력 순번, 새 행, 변경 보고)를 내보낸다.
+    호스트별 동시 요청 상한은 parse_many와 같다."""
+    items = ((row.get("url") or "", row) for row in rows)
+    for idx, (new, report) in run_per_host(items, refresh_price, max_workers, host_limits, dedup=False):
+        yield idx, new, report
@@ -1,116 +1,590 @@
-import subprocess
-from typing import Tuple, Optional
+import asyncio, atexit, os, subprocess, sys, threading, time
+from urllib.parse import urlparse
+from concurrent.futures import Future
+from typing import Tuple, Optional, Callable, Awaitable, Any
 from .common import DEFAULT_HEADERS, parse_price
+from .throttle import get_limiter
 
-def ensure_playwright_installed() -> bool:
+LAUNCH_ARGS = ["--no-sandbox", "--disable-dev-shm-usage"]
+
+# 브라우저 하나 안에서 호스트별로 동시에 열어 둘 페이지 수 (목록에 없는 호스트는 DEFAULT_RENDER_CONCURRENCY)
+RENDER_HOST_CONCURRENCY = {
+    "product.kyobobook.co.kr": 2,
+    "www.yes24.com": 3,
+    "www.aladin.co.kr": 3,
+    "www.ypbooks.co.kr": 2,
+}
+DEFAULT_RENDER_CONCURRENCY = 2
+
+class BrowserPool:
+    """프로세스 전체가 공유하는 Chromium 하나를 띄워 두고, 작업마다 새 context/page를 내어준다.
+
+    Playwright 객체는 전용 이벤트 루프 스레드에서만 다루며, 동기 코드에서는
+    run(job)으로 `async def job(page)`를 넘겨 결과를 받거나, submit(job)으로 Future만 받아
+    여러 작업을 동시에 돌린다(전체 max_pages, 호스트별 host_limits 이내).
+    브라우저는 recycle_after 페이지를 처리했거나 Chromium 메모리가 max_rss_mb를
+    넘으면 진행 중인 페이지가 끝난 뒤 새 브라우저로 교체된다.
+    """
+
+    def __init__(self, max_pages: int = 6, recycle_after: int = 200, max_rss_mb: int = 1500,
+                 host_limits: Optional[dict] = None):
+        self.max_pages = max_pages
+        self.host_limits = dict(RENDER_HOST_CONCURRENCY)
+        self.host_limits.update(host_limits or {})
+        self.recycle_after = recycle_after
+        self.max_rss_mb = max_rss_mb
+        self.stats = {"launches": 0, "recycles": 0, "pages": 0, "rss_mb": None}
+        self._start_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pw = None
+        self._browser = None
+        self._served: dict = {}
+        self._active: dict = {}
+        self._retired: set = set()
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._host_sems: dict = {}
+        self._launch_lock: Optional[asyncio.Lock] = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                t = threading.Thread(target=loop.run_forever, name="browser-pool", daemon=True)
+                t.start()
+                self._loop, self._thread = loop, t
+            return self._loop
+
+    def submit(self, job: Callable[[Any], Awaitable[Any]], host: Optional[str] = None, limiter=None) -> Future:
+        """job을 이벤트 루프에 올리고 바로 Future를 돌려준다. 여러 개를 올려 두면 페이지 여러 장에서 동시에 돈다.
+
+        host를 주면 그 호스트의 동시 페이지 수(host_limits)를 넘지 않고, limiter(토큰 버킷)를 주면
+        페이지를 잡기 전에 차례를 기다린 뒤 성공/실패를 알려준다.
+        """
+        return asyncio.run_coroutine_threadsafe(self._throttled(job, host, limiter), self._ensure_loop())
+
+    def run(self, job: Callable[[Any], Awaitable[Any]], timeout: Optional[float] = None,
+            host: Optional[str] = None, limiter=None):
+        return self.submit(job, host, limiter).result(timeout)
+
+    def warm(self, timeout: Optional[float] = 120) -> None:
+        """브라우저가 떠 있지 않으면 미리 띄워 둔다. 실패하면 예외를 그대로 올린다."""
+        asyncio.run_coroutine_threadsafe(self._current_browser(), self._ensure_loop()).result(timeout)
+
+    def close(self, timeout: Optional[float] = 30) -> None:
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+
+    async def _current_browser(self):
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+        async with self._launch_lock:
+            b = self._browser
+            if b is not None and (not b.is_connected() or self._should_recycle(b)):
+                self._retire(b)
+                b = None
+            if b is None:
+                if self._pw is None:
+                    from playwright.async_api import async_playwright
+                    self._pw = await async_playwright().start()
+                b = await self._pw.chromium.launch(headless=True, args=LAUNCH_ARGS)
+                self._browser = b
+                self._served[b] = 0
+                self._active[b] = 0
+                self.stats["launches"] += 1
+            return b
+
+    def _should_recycle(self, browser) -> bool:
+        served = self._served.get(browser, 0)
+        if served >= self.recycle_after:
+            return True
+        # /proc 스캔은 가볍지 않으니 10페이지마다만 확인
+        if self.max_rss_mb and served and served % 10 == 0:
+            rss = _children_rss_mb()
+            self.stats["rss_mb"] = rss
+            if rss is not None and rss > self.max_rss_mb:
+                return True
+        return False
+
+    def _retire(self, browser) -> None:
+        self._browser = None
+        self._retired.add(browser)
+        self.stats["recycles"] += 1
+        if not self._active.get(browser):
+            asyncio.ensure_future(self._close_browser(browser))
+
+    async def _close_browser(self, browser) -> None:
+        self._retired.discard(browser)
+        self._served.pop(browser, None)
+        self._active.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+    async def _throttled(self, job, host, limiter):
+        if limiter is not None:
+            wait = limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        try:
+            result = await self._with_page(job, host)
+        except Exception:
+            if limiter is not None:
+                limiter.feedback(ok=False)
+            raise
+        if limiter is not None:
+            limiter.feedback()
+        return result
+
+    async def _with_page(self, job, host: Optional[str] = None):
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_pages)
+        if host is None:
+            return await self._on_page(job)
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = self._host_sems[host] = asyncio.Semaphore(max(1, self.host_limits.get(host, DEFAULT_RENDER_CONCURRENCY)))
+        async with sem:
+            return await self._on_page(job)
+
+    async def _on_page(self, job):
+        async with self._sem:
+            browser = await self._current_browser()
+            self._active[browser] = self._active.get(browser, 0) + 1
+            context = None
+            try:
+                context = await browser.new_context(user_agent=DEFAULT_HEADERS.get("User-Agent"), locale="ko-KR")
+                page = await context.new_page()
+                return await job(page)
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                self.stats["pages"] += 1
+                # 이미 닫혀 장부에서 빠진 브라우저는 다시 넣지 않는다
+                if browser in self._active:
+                    self._active[browser] -= 1
+                    self._served[browser] = self._served.get(browser, 0) + 1
+                    if browser in self._retired and self._active[browser] <= 0:
+                        await self._close_browser(browser)
+
+    async def _shutdown(self) -> None:
+        browsers = set(self._retired)
+        if self._browser is not None:
+            browsers.add(self._browser)
+        self._browser = None
+        for b in browsers:
+            await self._close_browser(b)
+        if self._pw is not None:
+            try:
+                await self._pw.stop()
+            except Exception:
+                pass
+            self._pw = None
+
+def _children_rss_mb() -> Optional[float]:
+    """현재 프로세스의 자식(Chromium 등) 프로세스 RSS 합계(MB). /proc이 없으면 None."""
+    if not os.path.isdir("/proc"):
+        return None
+    children: dict = {}
+    rss: dict = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            pid = int(name)
+            children.setdefault(int(fields[1]), []).append(pid)
+            rss[pid] = int(fields[21])
+        except Exception:
+            continue
+    total = 0
+    stack = list(children.get(os.getpid(), []))
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+_pool_config: dict = {}
+
+def configure_browser_pool(**kwargs) -> None:
+    """max_pages / recycle_after / max_rss_mb / host_limits 설정. 이미 떠 있는 풀은 닫고 새 설정으로 다시 만든다.
+
+    설정하지 않은 max_pages는 환경변수 BOOK_BROWSER_PAGES를 따른다(cli.py는 --browser-pages/--render-limit).
+    """
+    global _pool
+    with _pool_lock:
+        _pool_config.update(kwargs)
+        old, _pool = _pool, None
+    if old is not None:
+        old.close()
+
+def get_browser_pool() -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = dict(_pool_config)
+            if "max_pages" not in config and os.environ.get("BOOK_BROWSER_PAGES", "").isdigit():
+                config["max_pages"] = max(1, int(os.environ["BOOK_BROWSER_PAGES"]))
+            _pool = BrowserPool(**config)
+        return _pool
+
+def shutdown_browser_pool() -> None:
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, None
+    if old is not None:
+        old.close()
+
+atexit.register(shutdown_browser_pool)
+
+# 브라우저 준비 상태. 프로세스 전체가 공유하며, 실패도 READY_RETRY_SECONDS 동안은 다시 확인하지 않는다.
+READY_RETRY_SECONDS = 600
+INSTALL_TIMEOUT = 600
+_readiness = {"state": "unknown", "detail": None, "checked_at": None, "took_s": None, "attempts": 0}
+_ready_lock = threading.Lock()
+_prewarm_thread: Optional[threading.Thread] = None
+
+def _set_state(state: str, detail: Optional[str] = None) -> None:
+    _readiness["state"] = state
+    _readiness["detail"] = detail
+
+def _probe_playwright() -> bool:
     try:
-        from playwright.sync_api import sync_playwright  # noqa: F401
-    except Exception:
+        import playwright.async_api  # noqa: F401
+    except Exception as e:
+        _set_state("unavailable", f"playwright 패키지 없음: {e}")
         return False
-    from playwright.sync_api import sync_playwright
+    _set_state("launching")
     try:
-        with sync_playwright() as p:
-            b = p.chromium.launch(headless=True, args=["--no-sandbox", "--disable-dev-shm-usage"])
-            b.close()
+        get_browser_pool().warm()
         return True
-    except Exception:
-        subprocess.run(["playwright", "install", "chromium"], check=False)
-        try:
-            with sync_playwright() as p:
-                b = p.chromium.launch(headless=True, args=["--no-sandbox", "--disable-dev-shm-usage"])
-                b.close()
+    except Exception as e:
+        first_err = e
+    _set_state("installing", f"Chromium 실행 실패, 설치 시도: {type(first_err).__name__}")
+    try:
+        subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"],
+                       check=False, capture_output=True, timeout=INSTALL_TIMEOUT)
+    except Exception as e:
+        _set_state("unavailable", f"Chromium 설치 실패: {type(e).__name__}: {e}")
+        return False
+    _set_state("launching")
+    try:
+        get_browser_pool().warm()
+        return True
+    except Exception as e:
+        _set_state("unavailable", f"Chromium 실행 실패: {type(e).__name__}: {e}")
+        return False
+
+def ensure_playwright_installed() -> bool:
+    """브라우저를 쓸 수 있는지. 확인(필요하면 설치)은 프로세스당 한 번이고, 결과를 기억한다.
+
+    성공하면 풀의 브라우저가 이미 떠 있는 상태가 된다. 실패는 READY_RETRY_SECONDS가 지나면 다시 확인한다.
+    다른 스레드(백그라운드 예열 포함)가 확인 중이면 끝날 때까지 기다린다.
+    """
+    with _ready_lock:
+        state, checked_at = _readiness["state"], _readiness["checked_at"]
+        if state == "ready":
             return True
-        except Exception:
+        if state == "unavailable" and checked_at is not None and time.time() - checked_at < READY_RETRY_SECONDS:
             return False
+        t0 = time.time()
+        _readiness["attempts"] += 1
+        ok = _probe_playwright()
+        if ok:
+            _set_state("ready")
+        _readiness["checked_at"] = time.time()
+        _readiness["took_s"] = round(time.time() - t0, 1)
+        return ok
 
-def fetch_html_playwright(url: str, timeout_ms: int = 45000) -> Tuple[str, str]:
-    if not ensure_playwright_installed():
-        raise RuntimeError("playwright/chromium 실행 불가")
-    from playwright.sync_api import sync_playwright
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True, args=["--no-sandbox", "--disable-dev-shm-usage"])
-        context = browser.new_context(user_agent=DEFAULT_HEADERS.get("User-Agent"), locale="ko-KR")
-        page = context.new_page()
+def start_prewarm() -> bool:
+    """백그라운드 스레드에서 설치 확인과 브라우저 실행을 시작한다. 이미 시작했으면 아무 일도 하지 않는다."""
+    global _prewarm_thread
+    with _pool_lock:
+        if _prewarm_thread is not None:
+            return False
+        _prewarm_thread = threading.Thread(target=ensure_playwright_installed, name="browser-prewarm", daemon=True)
+    _prewarm_thread.start()
+    return True
+
+def playwright_readiness() -> dict:
+    """UI 표시용 준비 상태: unknown / launching / installing / ready / unavailable (+ detail, 다음 재확인까지 남은 초)."""
+    st = dict(_readiness)
+    if st["state"] == "unavailable" and st["checked_at"] is not None:
+        st["retry_in_s"] = max(0, int(st["checked_at"] + READY_RETRY_SECONDS - time.time()))
+    return st
+
+def _submit(url: str, job) -> Future:
+    """URL 호스트의 동시 페이지 상한과 토큰 버킷을 거쳐 job을 풀에 올린다.
+    렌더 시간은 서버 지연이 아니므로 버킷에는 성공/실패만 알린다."""
+    host = (urlparse(url).hostname or "").lower()
+    return get_browser_pool().submit(job, host=host, limiter=get_limiter(url))
+
+# 가벼운 렌더: 파싱에 쓰지 않는 리소스와 서점 밖 도메인 요청은 끊는다
+BLOCK_RESOURCE_TYPES = {"image", "media", "font", "stylesheet", "texttrack", "eventsource", "websocket", "manifest", "ping"}
+# 서점 도메인이 아니어도 페이지 스크립트가 의존하는 공용 CDN
+ALLOWED_THIRD_PARTY = ("cdnjs.cloudflare.com", "cdn.jsdelivr.net", "ajax.googleapis.com", "code.jquery.com", "unpkg.com")
+
+# 파싱에 필요한 정보가 DOM에 올라왔는지 보는 신호: 도서 JSON-LD, 또는 본문에 '정가/판매가 … 원'
+_BOOK_READY_JS = """() => {
+  for (const s of document.querySelectorAll('script[type="application/ld+json"]')) {
+    if (/"@type"\\s*:\\s*\\[?\\s*"(Book|Product)"/.test(s.textContent || '')) return true;
+  }
+  const body = document.body ? document.body.innerText : '';
+  return /(정가|판매가)[^0-9]{0,20}[0-9][0-9,]*\\s*원/.test(body);
+}"""
+_KYOBO_READY_JS = """() => {
+  const v = document.querySelector('.prod_price .price .val, span.price > span.val');
+  return !!(v && v.textContent.trim());
+}"""
+
+# 호스트 접미사별 렌더 설정. 교보는 가격 영역의 innerText를 읽으므로 스타일시트는 남겨 둔다.
+RENDER_PROFILES = {
+    "kyobobook.co.kr": {"ready": _KYOBO_READY_JS, "block": BLOCK_RESOURCE_TYPES - {"stylesheet"}},
+    "yes24.com": {"ready": _BOOK_READY_JS, "block": BLOCK_RESOURCE_TYPES},
+    "aladin.co.kr": {"ready": _BOOK_READY_JS, "block": BLOCK_RESOURCE_TYPES},
+    "ypbooks.co.kr": {"ready": _BOOK_READY_JS, "block": BLOCK_RESOURCE_TYPES},
+}
+DEFAULT_PROFILE = {"ready": _BOOK_READY_JS, "block": BLOCK_RESOURCE_TYPES}
+READY_DEADLINE_MS = 6000
+
+_render_stats = {"pages": 0, "ready": 0, "networkidle": 0, "deadline": 0,
+                 "blocked_requests": 0, "allowed_requests": 0, "ready_ms": 0.0}
+_render_stats_lock = threading.Lock()
+
+def _bump(**kw) -> None:
+    with _render_stats_lock:
+        for k, v in kw.items():
+            _render_stats[k] += v
+
+def render_stats() -> dict:
+    """가벼운 렌더 통계: 준비 신호/networkidle/마감으로 끝난 페이지 수, 끊은/허용한 요청 수, 평균 대기."""
+    with _render_stats_lock:
+        st = dict(_render_stats)
+    ready_ms = st.pop("ready_ms")
+    st["avg_ready_ms"] = round(ready_ms / st["pages"], 1) if st["pages"] else None
+    return st
+
+def _site_suffix(host: str) -> Optional[str]:
+    for suffix in RENDER_PROFILES:
+        if host == suffix or host.endswith("." + suffix):
+            return suffix
+    return None
+
+async def _prepare_lean_page(page, url: str) -> dict:
+    """요청 라우팅을 걸고 이 URL의 렌더 설정을 돌려준다."""
+    host = (urlparse(url).hostname or "").lower()
+    suffix = _site_suffix(host)
+    profile = RENDER_PROFILES.get(suffix, DEFAULT_PROFILE)
+    block = profile["block"]
+    first_party = suffix or host
+
+    async def handle(route):
+        req = route.request
+        req_host = (urlparse(req.url).hostname or "").lower()
+        same_site = req_host == first_party or req_host.endswith("." + first_party)
+        third_party_ok = same_site or req_host.endswith(ALLOWED_THIRD_PARTY)
+        if req.resource_type in block or not third_party_ok:
+            _bump(blocked_requests=1)
+            try:
+                await route.abort()
+            except Exception:
+                pass
+            return
+        _bump(allowed_requests=1)
+        try:
+            await route.continue_()
+        except Exception:
+            pass
+
+    await page.route("**/*", handle)
+    return profile
+
+async def _wait_ready(page, profile: dict, deadline_ms: int) -> None:
+    """준비 신호와 networkidle 중 먼저 오는 쪽에서, 둘 다 안 오면 마감 시각에 돌아온다(마감은 둘이 함께 쓴다)."""
+    t0 = time.monotonic()
+    waits = {
+        asyncio.ensure_future(page.wait_for_function(profile["ready"], polling=100, timeout=deadline_ms)): "ready",
+        asyncio.ensure_future(page.wait_for_load_state("networkidle", timeout=deadline_ms)): "networkidle",
+    }
+    pending = set(waits)
+    how = "deadline"
+    try:
+        while pending and how == "deadline":
+            remaining = deadline_ms / 1000 - (time.monotonic() - t0)
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            # 실패(예: 스크립트 오류)로 끝난 쪽은 무시하고 남은 쪽을 계속 기다린다. 동시에 끝나면 준비 신호가 우선.
+            for task in sorted(done, key=lambda t: waits[t] != "ready"):
+                if not task.cancelled() and task.exception() is None:
+                    how = waits[task]
+                    break
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    _bump(pages=1, ready_ms=(time.monotonic() - t0) * 1000, **{how: 1})
+
+def _html_job(url: str, timeout_ms: int, lean: bool, ready_deadline_ms: int):
+    async def job(page):
         page.set_default_navigation_timeout(timeout_ms)
-        page.goto(url, wait_until="domcontentloaded")
-        page.wait_for_timeout(1500)
-        html, final_url = page.content(), page.url
-        context.close(); browser.close()
+        if lean:
+            profile = await _prepare_lean_page(page, url)
+            await page.goto(url, wait_until="domcontentloaded")
+            await _wait_ready(page, profile, ready_deadline_ms)
+        else:
+            await page.goto(url, wait_until="domcontentloaded")
+            await page.wait_for_timeout(1500)
+        html, final_url = await page.content(), page.url
         return final_url, html
+    return job
 
-def extract_kyobo_prices_playwright(url: str, timeout_ms: int = 45000):
+def submit_render(url: str, timeout_ms: int = 45000, lean: bool = True,
+                  ready_deadline_ms: int = READY_DEADLINE_MS) -> Future:
+    """렌더 작업을 올리고 바로 Future[(final_url, html)]를 돌려준다. 결과는 .result()로 기다린다."""
     if not ensure_playwright_installed():
         raise RuntimeError("playwright/chromium 실행 불가")
-    from playwright.sync_api import sync_playwright
+    return _submit(url, _html_job(url, timeout_ms, lean, ready_deadline_ms))
 
-    def text_of_first(page, selectors):
-        for sel in selectors:
-            try:
-                loc = page.locator(sel).first
-                if loc.count() > 0:
-                    txt = loc.inner_text().strip()
-                    if txt:
-                        return txt
-            except Exception:
-                continue
+def fetch_html_playwright(url: str, timeout_ms: int = 45000, lean: bool = True,
+                          ready_deadline_ms: int = READY_DEADLINE_MS) -> Tuple[str, str]:
+    """브라우저로 렌더한 HTML. lean=True면 불필요한 리소스를 끊고 준비 신호까지만 기다린다."""
+    return submit_render(url, timeout_ms, lean, ready_deadline_ms).result(timeout_ms / 1000 + 30)
+
+# 교보 가격 영역 셀렉터(앞에 있을수록 우선)와, 셀렉터로 못 찾았을 때 뒤따르는 가격을 볼 라벨
+KYOBO_SALE_SELECTORS = [
+    "css=.prod_price .price .val",
+    "css=.prod_price_box .prod_price .price .val",
+    "css=.prod_price_wrap .prod_price .price .val",
+    "css=.price_wrap .prod_price .price .val",
+    "css=span.price > span.val",
+    "xpath=//*[contains(@class,'prod_price')]//*[contains(@class,'price')]//*[contains(@class,'val')]",
+]
+KYOBO_LIST_SELECTORS = [
+    "css=.prod_price .sale_price .val",
+    "css=.prod_price_box .prod_price .sale_price .val",
+    "css=.prod_price_wrap .prod_price .sale_price .val",
+    "css=.price_wrap .prod_price .sale_price .val",
+    "css=span.sale_price > span.val",
+    "css=.prod_price .sale_price s",
+    "css=.prod_price_box .prod_price .sale_price s",
+    "xpath=//*[contains(@class,'prod_price')]//*[contains(@class,'sale_price')]//*[contains(@class,'val')]",
+]
+KYOBO_SALE_LABELS = ["최종 판매가", "판매가", "할인가"]
+KYOBO_LIST_LABELS = ["정가"]
+LABEL_CANDIDATES = 10
+
+# 한 번의 page.evaluate로 셀렉터별 첫 요소 텍스트와 라벨 뒤 '원' 후보 텍스트를 모두 모은다.
+# locator.first / inner_text / following:: 축을 그대로 흉내 내므로 결과는 요소를 하나씩 묻던 방식과 같다.
+# 셀렉터 텍스트에 숫자가 있으면(파이썬 parse_price가 값을 내면) 그 그룹의 라벨 탐색은 건너뛴다.
+_KYOBO_PRICE_JS = """(args) => {
+  const first = (sel) => {
+    if (sel.startsWith('xpath=')) {
+      return document.evaluate(sel.slice(6), document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    return document.querySelector(sel.startsWith('css=') ? sel.slice(4) : sel);
+  };
+  const texts = (sels) => sels.map((sel) => {
+    try {
+      const el = first(sel);
+      if (!el || !(el instanceof HTMLElement)) return null;
+      return el.innerText.trim();
+    } catch (e) { return null; }
+  });
+  const following = (label) => {
+    try {
+      const xp = "//*[normalize-space(text())='" + label + "' or contains(normalize-space(.), '" + label + "')]";
+      const node = document.evaluate(xp, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+      if (!node) return null;
+      const snap = document.evaluate("following::*[contains(., '원')]", node, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+      const out = [];
+      for (let i = 0; i < Math.min(snap.snapshotLength, %d); i++) {
+        const el = snap.snapshotItem(i);
+        if (!(el instanceof HTMLElement)) return {error: true};
+        out.push(el.innerText.trim());
+      }
+      return out;
+    } catch (e) { return {error: true}; }
+  };
+  const hasDigit = (t) => !!t && /\\p{Nd}/u.test(t);
+  const sale = texts(args.sale), list = texts(args.list);
+  const labels = {};
+  const firstText = (ts) => ts.find((t) => t) || null;
+  if (!hasDigit(firstText(sale))) for (const l of args.saleLabels) labels[l] = following(l);
+  if (!hasDigit(firstText(list))) for (const l of args.listLabels) labels[l] = following(l);
+  return {sale, list, labels};
+}""" % LABEL_CANDIDATES
+
+def _label_price(candidates) -> Optional[int]:
+    if not isinstance(candidates, list):
         return None
+    for txt in candidates:
+        v = parse_price(txt)
+        if v and 5000 <= v <= 500000:
+            return v
+    return None
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True, args=["--no-sandbox", "--disable-dev-shm-usage"])
-        context = browser.new_context(user_agent=DEFAULT_HEADERS.get("User-Agent"), locale="ko-KR")
-        page = context.new_page()
-        page.set_default_navigation_timeout(timeout_ms)
-        page.goto(url, wait_until="domcontentloaded")
-        page.wait_for_timeout(2200)
-
-        sale_text = text_of_first(page, [
-            "css=.prod_price .price .val",
-            "css=.prod_price_box .prod_price .price .val",
-            "css=.prod_price_wrap .prod_price .price .val",
-            "css=.price_wrap .prod_price .price .val",
-            "css=span.price > span.val",
-            "xpath=//*[contains(@class,'prod_price')]//*[contains(@class,'price')]//*[contains(@class,'val')]",
-        ])
-        list_text = text_of_first(page, [
-            "css=.prod_price .sale_price .val",
-            "css=.prod_price_box .prod_price .sale_price .val",
-            "css=.prod_price_wrap .prod_price .sale_price .val",
-            "css=.price_wrap .prod_price .sale_price .val",
-            "css=span.sale_price > span.val",
-            "css=.prod_price .sale_price s",
-            "css=.prod_price_box .prod_price .sale_price s",
-            "xpath=//*[contains(@class,'prod_price')]//*[contains(@class,'sale_price')]//*[contains(@class,'val')]",
-        ])
-
-        sale_price = parse_price(sale_text)
-        list_price = parse_price(list_text)
-
-        def pick_following_price(label_text: str) -> Optional[int]:
-            try:
-                loc = page.locator(f"xpath=//*[normalize-space(text())='{label_text}' or contains(normalize-space(.), '{label_text}')]").first
-                if loc.count() == 0:
-                    return None
-                cand = loc.locator("xpath=following::*[contains(., '원')]")
-                vals = []
-                for i in range(min(cand.count(), 10)):
-                    txt = cand.nth(i).inner_text().strip()
-                    v = parse_price(txt)
-                    if v and 5000 <= v <= 500000:
-                        vals.append(v)
-                return vals[0] if vals else None
-            except Exception:
-                return None
+def _pick_kyobo_prices(found: dict) -> Tuple[Optional[int], Optional[int]]:
+    """셀렉터는 앞에서부터 처음 비어 있지 않은 텍스트, 없으면 라벨 순서대로 뒤따르는 5천~50만원 값."""
+    sale_text = next((t for t in found.get("sale") or [] if t), None)
+    list_text = next((t for t in found.get("list") or [] if t), None)
+    sale_price = parse_price(sale_text)
+    list_price = parse_price(list_text)
+    labels = found.get("labels") or {}
+    if sale_price is None:
+        for label in KYOBO_SALE_LABELS:
+            sale_price = _label_price(labels.get(label))
+            if sale_price:
+                break
+    if list_price is None:
+        for label in KYOBO_LIST_LABELS:
+            list_price = _label_price(labels.get(label))
+            if list_price:
+                break
 
-        if sale_price is None:
-            sale_price = pick_following_price("최종 판매가") or pick_following_price("판매가") or pick_following_price("할인가")
-        if list_price is None:
-            list_price = pick_following_price("정가")
+    if sale_price is not None and list_price is None:
+        list_price = sale_price
+    if list_price is not None and sale_price is None:
+        sale_price = list_price
+    return list_price, sale_price
 
-        if sale_price is not None and list_price is None:
-            list_price = sale_price
-        if list_price is not None and sale_price is None:
-            sale_price = list_price
+def extract_kyobo_prices_playwright(url: str, timeout_ms: int = 45000, lean: bool = True,
+                                    ready_deadline_ms: int = READY_DEADLINE_MS):
+    if not ensure_playwright_installed():
+        raise RuntimeError("playwright/chromium 실행 불가")
+
+    async def job(page):
+        page.set_default_navigation_timeout(timeout_ms)
+        if lean:
+            profile = await _prepare_lean_page(page, url)
+            await page.goto(url, wait_until="domcontentloaded")
+            await _wait_ready(page, profile, ready_deadline_ms)
+        else:
+            await page.goto(url, wait_until="domcontentloaded")
+            await page.wait_for_timeout(2200)
 
-        html, final_url = page.content(), page.url
-        context.close(); browser.close()
+        found = await page.evaluate(_KYOBO_PRICE_JS, {
+            "sale": KYOBO_SALE_SELECTORS, "list": KYOBO_LIST_SELECTORS,
+            "saleLabels": KYOBO_SALE_LABELS, "listLabels": KYOBO_LIST_LABELS,
+        })
+        list_price, sale_price = _pick_kyobo_prices(found)
+
+        html, final_url = await page.content(), page.url
         return final_url, html, list_price, sale_price
+
+    return _submit(url, job).result(timeout_ms / 1000 + 30)
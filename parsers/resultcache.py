@@ -0,0 +1,90 @@
+import json, os, sqlite3, threading, time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+Key = Tuple[str, str]
+
+DEFAULT_TTL = 600
+DEFAULT_MAX_ITEMS = 5000
+
+class ResultCache:
+    """(site, product_id) 키로 파싱 결과 행을 보관하는 캐시. 메모리 LRU + 선택적 SQLite 파일."""
+
+    def __init__(self, ttl: int = DEFAULT_TTL, path: Optional[str] = None, max_items: int = DEFAULT_MAX_ITEMS):
+        self.ttl = ttl
+        self.max_items = max_items
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[Key, tuple[float, dict]]" = OrderedDict()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (site TEXT, product_id TEXT, stored_at REAL, row TEXT, "
+                "PRIMARY KEY (site, product_id))")
+
+    def get(self, key: Key) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is None and self._conn is not None:
+                rec = self._conn.execute(
+                    "SELECT stored_at, row FROM results WHERE site = ? AND product_id = ?", key).fetchone()
+                if rec is not None:
+                    hit = (rec[0], json.loads(rec[1]))
+                    self._remember(key, hit)
+            if hit is None or now - hit[0] >= self.ttl:
+                self.stats["misses"] += 1
+                return None
+            self._mem.move_to_end(key)
+            self.stats["hits"] += 1
+            return dict(hit[1])
+
+    def put(self, key: Key, row: dict) -> None:
+        entry = (time.time(), dict(row))
+        with self._lock:
+            self._remember(key, entry)
+            self.stats["stores"] += 1
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                    (key[0], key[1], entry[0], json.dumps(entry[1], ensure_ascii=False, default=str)))
+
+    def _remember(self, key: Key, entry: tuple) -> None:
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM results")
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+_cache_checked = False
+
+def configure_result_cache(ttl: int = DEFAULT_TTL, path: Optional[str] = None,
+                           max_items: int = DEFAULT_MAX_ITEMS, enabled: bool = True) -> Optional[ResultCache]:
+    global _cache, _cache_checked
+    with _cache_lock:
+        _cache = ResultCache(ttl=ttl, path=path, max_items=max_items) if enabled else None
+        _cache_checked = True
+        return _cache
+
+def get_result_cache() -> Optional[ResultCache]:
+    """기본은 꺼져 있다(같은 URL을 다시 조회하면 항상 새로 가져온다).
+
+    환경변수 BOOK_RESULT_CACHE가 "memory"면 메모리 캐시, 그 밖의 값이면 그 경로의 파일에도 남긴다.
+    """
+    global _cache, _cache_checked
+    if not _cache_checked:
+        with _cache_lock:
+            if not _cache_checked:
+                where = os.environ.get("BOOK_RESULT_CACHE") or None
+                if where:
+                    _cache = ResultCache(path=None if where == "memory" else where)
+                _cache_checked = True
+    return _cache
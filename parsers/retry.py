@@ -0,0 +1,145 @@
+import random, re, threading, time
+from typing import Dict, Optional
+
+# 실패 종류. 호스트 자체가 아픈 신호(HOST_FAILURES)만 회로 차단기에 누적한다.
+NOT_FOUND = "not_found"      # 404/410: 재시도해도 같다
+CLIENT = "client"            # 그 밖의 4xx
+THROTTLED = "throttled"      # 429
+BLOCKED = "blocked"          # 403/봇 확인 페이지
+SERVER = "server"            # 5xx
+TIMEOUT = "timeout"
+CONNECTION = "connection"
+SHORT = "short"              # 200이지만 본문이 비정상적으로 짧음
+CIRCUIT_OPEN = "circuit_open"
+
+RETRYABLE = {THROTTLED, BLOCKED, SERVER, TIMEOUT, CONNECTION, SHORT}
+HOST_FAILURES = {THROTTLED, BLOCKED, SERVER, TIMEOUT, CONNECTION}
+
+BACKOFF_BASE = 0.3
+BACKOFF_CAP = 4.0
+
+# 봇 확인/차단 페이지에 나오는 문구. 정상 상품 페이지 스크립트에도 단어가 섞일 수 있어 짧은 본문에서만 본다.
+_CHALLENGE = re.compile(
+    r"captcha|cf-chl|challenge-platform|access denied|are you a robot|unusual traffic|"
+    r"비정상적인 접근|자동입력 방지|보안 확인|접근이 차단", re.I)
+CHALLENGE_MAX_LEN = 30000
+
+class FetchError(RuntimeError):
+    """fetch_html 실패. kind로 원인 종류(NOT_FOUND, BLOCKED, ...)를 알 수 있다."""
+
+    def __init__(self, kind: str, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+
+class CircuitOpenError(FetchError):
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(CIRCUIT_OPEN, f"{host} 요청이 연속 실패해 {retry_in:.0f}초 동안 건너뜁니다.")
+        self.host = host
+        self.retry_in = retry_in
+
+def classify_status(status: int) -> Optional[str]:
+    if status < 400:
+        return None
+    if status in (404, 410):
+        return NOT_FOUND
+    if status == 429:
+        return THROTTLED
+    if status in (401, 403):
+        return BLOCKED
+    if status == 408:
+        return TIMEOUT
+    if status >= 500:
+        return SERVER
+    return CLIENT
+
+def looks_like_challenge(text: str) -> bool:
+    return len(text) <= CHALLENGE_MAX_LEN and _CHALLENGE.search(text) is not None
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """attempt번째(0부터) 재시도 전 대기 시간. 지수 증가 상한 안에서 고르게 흩뿌린다(full jitter)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class CircuitBreaker:
+    """호스트 하나의 회로 차단기.
+
+    연속 threshold번 호스트 실패가 나면 열리고(open), cooldown초 동안 요청을 바로 거절한다.
+    그 뒤 한 요청만 시험 삼아 보내(half-open) 성공하면 닫고, 실패하면 다시 연다.
+    """
+
+    def __init__(self, host: str, threshold: int = 5, cooldown: float = 30.0):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.stats = {"trips": 0, "rejected": 0, "failures": 0, "successes": 0, "last_failure": None}
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_request(self) -> None:
+        with self._lock:
+            if self.state == "closed":
+                return
+            wait = self.opened_at + self.cooldown - time.monotonic()
+            if self.state == "open" and wait <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return
+            self.stats["rejected"] += 1
+            raise CircuitOpenError(self.host, max(wait, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.stats["successes"] += 1
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def release(self) -> None:
+        """호스트 상태와 무관한 결과(404, 짧은 본문 등). 연속 실패 수는 그대로 두고 시험 요청 자리만 비운다."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self, kind: str) -> None:
+        with self._lock:
+            self.stats["failures"] += 1
+            self.stats["last_failure"] = kind
+            self._probing = False
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.stats["trips"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures, **self.stats}
+
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def configure_breakers(threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN) -> None:
+    """새 설정으로 모든 호스트의 차단기를 초기화한다."""
+    global BREAKER_THRESHOLD, BREAKER_COOLDOWN
+    with _breakers_lock:
+        BREAKER_THRESHOLD, BREAKER_COOLDOWN = threshold, cooldown
+        _breakers.clear()
+
+def get_breaker(host: str) -> CircuitBreaker:
+    with _breakers_lock:
+        br = _breakers.get(host)
+        if br is None:
+            br = _breakers[host] = CircuitBreaker(host, BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+        return br
+
+def breaker_stats() -> Dict[str, dict]:
+    """호스트별 상태(closed/open/half_open), 연속 실패, 차단 횟수(trips), 거절한 요청 수."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {br.host: br.snapshot() for br in breakers}
@@ -1,8 +1,25 @@
-from typing import Dict
+import re, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
 from .yes24 import parse_yes24
 from .aladin import parse_aladin
 from .kyobo import parse_kyobo
 from .ypbooks import parse_ypbooks
+from .bibcache import get_bib_cache
+from .resultcache import get_result_cache
+from .retry import CircuitOpenError
+from .timing import count, profiled, recording
+
+# 서점 호스트별 동시 요청 상한 (목록에 없는 호스트는 DEFAULT_HOST_CONCURRENCY)
+HOST_CONCURRENCY = {
+    "product.kyobobook.co.kr": 3,
+    "www.yes24.com": 4,
+    "www.aladin.co.kr": 4,
+    "www.ypbooks.co.kr": 3,
+}
+DEFAULT_HOST_CONCURRENCY = 2
 
 def detect_site(url: str) -> str:
     u = url.lower()
@@ -12,16 +29,148 @@ def detect_site(url: str) -> str:
     if "ypbooks.co.kr" in u: return "YPBOOKS"
     return "UNKNOWN"
 
-def parse_any(url: str, enabled_sites: Dict[str, bool]) -> dict:
-    site = detect_site(url)
-    if site in enabled_sites and not enabled_sites.get(site, True):
-        return {"site": site, "url": url, "status": "skipped",
-                "error": "해당 서점이 비활성화(체크 해제) 상태라 건너뛰었습니다.", "parse_mode": "skipped"}
+# 서점별 상품 ID 패턴. m./www. 호스트, 대소문자, 추적 파라미터와 무관하게 같은 상품을 가리킨다.
+PRODUCT_ID_PATTERNS = {
+    "KYobo": re.compile(r"/detail/([A-Za-z0-9]+)"),
+    "YES24": re.compile(r"/Goods/(?:Detail/)?(\d+)", re.I),
+    "ALADIN": re.compile(r"[?&]ItemId=(\d+)", re.I),
+    "YPBOOKS": re.compile(r"/books/(\d+)", re.I),
+}
+
+def canonical_key(url: str) -> Optional[Tuple[str, str]]:
+    """지원 서점 상품 URL을 (site, product_id)로 바꾼다. 알 수 없으면 None."""
+    site = detect_site(url or "")
+    pat = PRODUCT_ID_PATTERNS.get(site)
+    m = pat.search(url) if pat else None
+    if not m:
+        return None
+    pid = m.group(1)
+    return site, pid.upper() if site == "KYobo" else pid
+
+def dedup_key(url: str):
+    """중복 판정용 키. 상품 키를 만들 수 없는 URL은 URL 문자열 그대로."""
+    url = (url or "").strip()
+    return canonical_key(url) or url
+
+def _parse_site(site: str, url: str) -> dict:
     try:
         if site == "YES24": return parse_yes24(url)
         if site == "ALADIN": return parse_aladin(url)
         if site == "KYobo": return parse_kyobo(url)
         if site == "YPBOOKS": return parse_ypbooks(url)
         return {"site": site, "url": url, "status": "failed", "error": "지원하지 않는 URL 도메인입니다.", "parse_mode": "unknown"}
+    except CircuitOpenError as e:
+        return {"site": site, "url": url, "status": "failed", "error": str(e), "parse_mode": "circuit-open"}
     except Exception as e:
         return {"site": site, "url": url, "status": "failed", "error": f"예외 발생: {type(e).__name__}: {e}", "parse_mode": "exception"}
+
+def parse_any(url: str, enabled_sites: Dict[str, bool], profile: bool = False) -> dict:
+    """URL 한 건을 파싱한다. 결과 행의 timings에 단계별 소요 시간(ms)과 요청 횟수/바이트를 남기고,
+    profile=True이면 결과 캐시를 건너뛰고 실제로 다시 파싱해 프로파일러 보고서를 profile 필드에 담는다."""
+    with recording() as timer:
+        t0 = time.perf_counter()
+        if profile:
+            row, report = profiled(_parse_any, url, enabled_sites, use_cache=False)
+            row["profile"] = report
+        else:
+            row = _parse_any(url, enabled_sites)
+        timer.add("total", (time.perf_counter() - t0) * 1000)
+    row["timings"] = timer.as_dict()
+    return row
+
+def _parse_any(url: str, enabled_sites: Dict[str, bool], use_cache: bool = True) -> dict:
+    site = detect_site(url)
+    if site in enabled_sites and not enabled_sites.get(site, True):
+        return {"site": site, "url": url, "status": "skipped",
+                "error": "해당 서점이 비활성화(체크 해제) 상태라 건너뛰었습니다.", "parse_mode": "skipped"}
+    key = canonical_key(url)
+    cache = get_result_cache() if key and use_cache else None
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            count("result_cache_hit")
+            return hit
+    row = _parse_site(site, url)
+    if row.get("status") == "success":
+        # 같은 ISBN을 다른 서점에서 이미 읽었다면 빈 서지 필드를 채우고, 이번 결과도 공유한다
+        bib = get_bib_cache()
+        if bib is not None:
+            if bib.fill(row):
+                count("bib_fill")
+            bib.put(row)
+        if cache is not None:
+            cache.put(key, row)
+    return row
+
+def _host_of(url: str) -> str:
+    try:
+        return (urlparse(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+def parse_many(urls: Iterable[str], enabled_sites: Dict[str, bool], max_workers: int = 8,
+               host_limits: Optional[Dict[str, int]] = None) -> Iterator[Tuple[int, dict]]:
+    """URL들을 동시에 parse_any로 처리하고, 끝나는 순서대로 (입력 순번, 결과 행)을 내보낸다.
+
+    호스트마다 host_limits(기본 HOST_CONCURRENCY) 이상은 동시에 요청하지 않으며,
+    입력은 필요한 만큼만 읽으므로 긴 이터러블도 일정한 메모리로 처리된다.
+    """
+    return run_per_host(((url, url) for url in urls), lambda url: parse_any(url, enabled_sites),
+                        max_workers, host_limits)
+
+def run_per_host(items: Iterable[Tuple[str, object]], job: Callable[[object], object], max_workers: int = 8,
+                 host_limits: Optional[Dict[str, int]] = None, dedup: bool = True) -> Iterator[Tuple[int, object]]:
+    """(URL, 인자)마다 job(인자)를 URL 호스트별 상한 안에서 동시에 돌리고, 끝나는 순서대로 (입력 순번, 결과)를 낸다.
+
+    dedup=True면 같은 상품 키는 한 번만 돌리고 결과 행의 사본을 나머지 순번에도 돌려준다.
+    """
+    limits = dict(HOST_CONCURRENCY)
+    limits.update(host_limits or {})
+    source = enumerate(items)
+    exhausted = False
+    waiting: Dict[str, deque] = {}
+    active: Dict[str, int] = {}
+    # 같은 상품 키의 URL은 한 번만 가져오고, 결과를 모든 입력 순번에 돌려준다
+    by_key: Dict[object, list] = {}
+    pending = 0
+    lookahead = max_workers * 4
+    futures = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            while not exhausted and pending < lookahead:
+                try:
+                    idx, (url, arg) = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                key = dedup_key(url) if dedup else idx
+                if key in by_key:
+                    by_key[key].append(idx)
+                    continue
+                idxs = by_key[key] = [idx]
+                waiting.setdefault(_host_of(url), deque()).append((key, idxs, arg))
+                pending += 1
+
+            for host in list(waiting):
+                queue = waiting[host]
+                limit = max(1, limits.get(host, DEFAULT_HOST_CONCURRENCY))
+                while queue and active.get(host, 0) < limit and len(futures) < max_workers:
+                    key, idxs, arg = queue.popleft()
+                    futures[pool.submit(job, arg)] = (key, idxs, host)
+                    active[host] = active.get(host, 0) + 1
+                if not queue:
+                    del waiting[host]
+
+            if not futures:
+                return
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key, idxs, host = futures.pop(fut)
+                del by_key[key]
+                active[host] -= 1
+                pending -= 1
+                row = fut.result()
+                for n, idx in enumerate(idxs):
+                    yield idx, row if n == 0 else dict(row)
@@ -0,0 +1,137 @@
+import threading, time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# 호스트별 기본 요청 속도(초당). 목록에 없는 호스트는 DEFAULT_RATE.
+HOST_RATE = {
+    "product.kyobobook.co.kr": 4.0,
+    "search.kyobobook.co.kr": 2.0,
+    "www.yes24.com": 5.0,
+    "www.aladin.co.kr": 5.0,
+    "www.ypbooks.co.kr": 4.0,
+    "html.duckduckgo.com": 1.0,
+}
+DEFAULT_RATE = 2.0
+
+# 적응 규칙: 건강한 응답마다 기본 속도의 INCREASE_STEP만큼 올리고(최대 MAX_FACTOR배),
+# 429/403/5xx/시간 초과나 느린 응답이면 DECREASE_FACTOR배로 줄인다(최소 MIN_FACTOR배).
+INCREASE_STEP = 0.05
+DECREASE_FACTOR = 0.5
+SLOW_DECREASE_FACTOR = 0.8
+MIN_FACTOR = 0.125
+MAX_FACTOR = 2.0
+SLOW_LATENCY = 3.0
+DECREASE_COOLDOWN = 1.0
+
+class TokenBucket:
+    """호스트 하나의 토큰 버킷. acquire()는 다음 토큰 차례까지 기다린 뒤 돌아온다.
+
+    동시에 나간 요청들의 나쁜 응답이 한꺼번에 돌아와도 속도가 바닥까지 떨어지지 않도록,
+    감속은 DECREASE_COOLDOWN초에 한 번만 적용한다.
+    """
+
+    def __init__(self, host: str, rate: float, burst: Optional[float] = None):
+        self.host = host
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.stats = {"requests": 0, "waited": 0, "wait_ms": 0.0, "increases": 0, "decreases": 0,
+                      "latency_ewma": None, "last_signal": None}
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """토큰 하나를 예약하고 차례가 올 때까지 잔다. 기다린 시간(초)을 돌려준다."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def reserve(self) -> float:
+        """토큰 하나를 예약만 하고, 차례까지 남은 시간(초)을 돌려준다. 비동기 코드에서는 이만큼 await sleep."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.stats["requests"] += 1
+            if wait > 0:
+                self.stats["waited"] += 1
+                self.stats["wait_ms"] += wait * 1000
+        return wait
+
+    def feedback(self, status: Optional[int] = None, latency: Optional[float] = None, ok: bool = True) -> None:
+        """응답 결과를 알려 속도를 조정한다. status=None이고 ok=False면 시간 초과/연결 실패로 본다."""
+        with self._lock:
+            if latency is not None:
+                prev = self.stats["latency_ewma"]
+                self.stats["latency_ewma"] = latency if prev is None else prev * 0.8 + latency * 0.2
+            if not ok or (status is not None and (status in (403, 429) or status >= 500)):
+                self._decrease(DECREASE_FACTOR, status or "error")
+            elif latency is not None and latency > SLOW_LATENCY:
+                self._decrease(SLOW_DECREASE_FACTOR, "slow")
+            else:
+                new_rate = min(self.base_rate * MAX_FACTOR, self.rate + self.base_rate * INCREASE_STEP)
+                if new_rate > self.rate:
+                    self._set_rate(new_rate)
+                    self.stats["increases"] += 1
+
+    def _decrease(self, factor: float, signal) -> None:
+        self.stats["last_signal"] = signal
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self._set_rate(max(self.base_rate * MIN_FACTOR, self.rate * factor))
+        self.stats["decreases"] += 1
+
+    def _set_rate(self, rate: float) -> None:
+        self._refill(time.monotonic())
+        self.rate = rate
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            if stats["latency_ewma"] is not None:
+                stats["latency_ewma"] = round(stats["latency_ewma"], 3)
+            stats["wait_ms"] = round(stats["wait_ms"], 1)
+            return {"rate": round(self.rate, 3), "base_rate": self.base_rate, **stats}
+
+_buckets: Dict[str, TokenBucket] = {}
+_rates: Dict[str, float] = dict(HOST_RATE)
+_enabled = True
+_lock = threading.Lock()
+
+def configure_throttle(rates: Optional[Dict[str, float]] = None, enabled: bool = True) -> None:
+    """호스트별 기본 속도를 덮어쓰고(rates) 모든 버킷을 새로 만든다. enabled=False면 제한하지 않는다."""
+    global _enabled
+    with _lock:
+        _rates.clear()
+        _rates.update(HOST_RATE)
+        _rates.update(rates or {})
+        _enabled = enabled
+        _buckets.clear()
+
+def get_limiter(url_or_host: str) -> Optional[TokenBucket]:
+    """URL(또는 호스트)의 버킷. 제한이 꺼져 있으면 None."""
+    if not _enabled:
+        return None
+    host = urlparse(url_or_host).hostname if "://" in url_or_host else url_or_host
+    host = (host or "").lower()
+    with _lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket(host, _rates.get(host, DEFAULT_RATE))
+        return bucket
+
+def limiter_stats() -> Dict[str, dict]:
+    """호스트별 현재 속도(rate)/기본 속도/대기 횟수·시간/증감 횟수/지연 EWMA."""
+    with _lock:
+        buckets = list(_buckets.values())
+    return {b.host: b.snapshot() for b in buckets}
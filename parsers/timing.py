@@ -0,0 +1,89 @@
+import contextvars, io, threading, time
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple
+
+# 행(row)에 붙는 진단용 필드. 표/엑셀 본문에는 내보내지 않는다.
+DIAGNOSTIC_KEYS = ("timings", "profile")
+
+class StageTimer:
+    """URL 한 건을 처리하는 동안 단계별 소요 시간(ms)과 카운터를 모은다.
+
+    검색 보조처럼 다른 스레드에서 도는 단계도 같은 타이머에 더하므로 잠금을 둔다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values: dict[str, float] = {}
+
+    def add(self, name: str, value: float) -> None:
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + value
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {k: (round(v, 1) if isinstance(v, float) else v) for k, v in self.values.items()}
+
+_current: contextvars.ContextVar[Optional[StageTimer]] = contextvars.ContextVar("stage_timer", default=None)
+
+def current_timer() -> Optional[StageTimer]:
+    return _current.get()
+
+@contextmanager
+def recording():
+    """이 블록 안에서 호출된 stage()/count()를 새 타이머에 모은다."""
+    timer = StageTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+@contextmanager
+def stage(name: str):
+    """현재 타이머가 있으면 블록의 경과 시간(ms)을 name 단계에 더한다. 없으면 아무 일도 하지 않는다."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, (time.perf_counter() - t0) * 1000)
+
+def count(name: str, n: int = 1) -> None:
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, n)
+
+def bind(fn: Callable) -> Callable:
+    """스레드 풀에 넘길 함수를 현재 컨텍스트(타이머 포함)에 묶는다."""
+    ctx = contextvars.copy_context()
+    return lambda *a, **kw: ctx.run(fn, *a, **kw)
+
+def profiled(fn: Callable, *args, **kwargs) -> Tuple[object, str]:
+    """fn을 프로파일러 아래에서 실행하고 (결과, 보고서 텍스트)를 돌려준다.
+
+    pyinstrument가 설치돼 있으면 그것을, 없으면 cProfile(누적 시간 상위 40개)을 쓴다.
+    """
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        Profiler = None
+    if Profiler is not None:
+        profiler = Profiler()
+        profiler.start()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            profiler.stop()
+        return result, profiler.output_text(unicode=True, color=False)
+
+    import cProfile, pstats
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(fn, *args, **kwargs)
+    finally:
+        buf = io.StringIO()
+        pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(40)
+    return result, buf.getvalue()
@@ -1,53 +1,139 @@
-import io
+import io, math
+from itertools import chain, islice
+from typing import IO, Iterable
 import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
+from parsers.common import PRICE_STATE_KEYS
+from parsers.timing import DIAGNOSTIC_KEYS
 
 STATUS_KO={"success":"성공","failed":"실패","skipped":"제외"}
-PARSEMODE_KO={"requests":"자동","playwright":"브라우저","skipped":"제외","unknown":"알수없음","exception":"오류"}
+PARSEMODE_KO={"requests":"자동","playwright":"브라우저","skipped":"제외","unknown":"알수없음","exception":"오류","circuit-open":"일시차단"}
 SITE_KO={"KYobo":"교보문고","YES24":"YES24","ALADIN":"알라딘","YPBOOKS":"영풍문고"}
 COLUMN_KO={"site":"서점","url":"상품 URL","status":"처리상태","isbn":"ISBN","title":"도서명","author":"저자",
            "publisher":"출판사","list_price":"정가","sale_price":"판매가","product_id":"상품ID",
            "parse_mode":"처리방식","error":"오류","note":"비고"}
 
-def to_xlsx_bytes(df_raw: pd.DataFrame) -> bytes:
-    df=df_raw.copy()
-    if "note" not in df.columns:
-        df["note"]=""
+# 진단 시트 컬럼 (parse_any가 행에 남기는 timings 필드)
+DIAG_COLUMN_KO={"total":"전체(ms)","fetch":"다운로드(ms)","parse":"파싱(ms)","search":"검색보조(ms)",
+                "search_kyobo":"교보검색(ms)","search_ddg":"DDG추측(ms)","search_title":"제목재검색(ms)",
+                "render":"브라우저(ms)","throttle":"속도제한 대기(ms)","fetch_attempts":"요청횟수","bytes":"받은 바이트",
+                "cache_hit":"HTTP캐시","result_cache_hit":"결과캐시","bib_fill":"서지캐시"}
 
-    if "site" in df.columns:
-        df["site"]=df["site"].map(SITE_KO).fillna(df["site"])
-    if "status" in df.columns:
-        df["status"]=df["status"].map(STATUS_KO).fillna(df["status"])
-    if "parse_mode" in df.columns:
-        df["parse_mode"]=df["parse_mode"].map(PARSEMODE_KO).fillna(df["parse_mode"])
+def diagnostics_frame(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """행마다 남은 timings를 URL별 한 줄의 표로 편다."""
+    base=pd.DataFrame({
+        "서점": df_raw["site"].map(SITE_KO).fillna(df_raw["site"]) if "site" in df_raw.columns else "",
+        "처리방식": df_raw["parse_mode"].map(PARSEMODE_KO).fillna(df_raw["parse_mode"]) if "parse_mode" in df_raw.columns else "",
+        "상품 URL": df_raw["url"] if "url" in df_raw.columns else "",
+    }, index=df_raw.index)
+    timings=df_raw["timings"] if "timings" in df_raw.columns else pd.Series([None]*len(df_raw), index=df_raw.index)
+    diag=pd.DataFrame([t if isinstance(t, dict) else {} for t in timings], index=df_raw.index)
+    diag=diag[[k for k in DIAG_COLUMN_KO if k in diag.columns]].rename(columns=DIAG_COLUMN_KO)
+    return pd.concat([base, diag], axis=1)
 
-    # Excel에서는 처리상태 컬럼 제거
-    if "status" in df.columns:
-        df = df.drop(columns=["status"])
+WON_FORMAT='#,##0"원"'
+MONEY_COLUMNS=("list_price","sale_price")
+# URL은 맨 오른쪽으로
+PREFERRED=["site","isbn","title","author","publisher","list_price","sale_price","note","product_id","parse_mode","error"]
+WIDTH_SAMPLE=200
 
-    df=df.rename(columns=COLUMN_KO)
+def _cell_value(v):
+    if v is None or (isinstance(v,float) and math.isnan(v)):
+        return None
+    if isinstance(v,(dict,list,tuple,set)):
+        return str(v)
+    return v
 
-    # URL은 맨 오른쪽으로
-    preferred=["서점","ISBN","도서명","저자","출판사","정가","판매가","비고","상품ID","처리방식","오류"]
-    cols=[c for c in preferred if c in df.columns] + [c for c in df.columns if c not in preferred and c != "상품 URL"]
-    if "상품 URL" in df.columns:
-        cols = cols + ["상품 URL"]
-    df=df[cols]
+def _export_columns(sample: list[dict]) -> list[str]:
+    """엑셀 '결과' 시트의 컬럼(원래 키). PREFERRED와 상품 URL은 표본과 무관하게 항상 두고,
+    표본에 보이는 그 밖의 키만 덧붙인다(처리상태/진단 필드는 뺀다)."""
+    skip={"status","url",*PREFERRED,*DIAGNOSTIC_KEYS,*PRICE_STATE_KEYS}
+    extra=[]
+    for row in sample:
+        for k in row:
+            if k not in skip:
+                skip.add(k)
+                extra.append(k)
+    return PREFERRED+extra+["url"]
 
+def _export_value(key: str, row: dict):
+    v=_cell_value(row.get(key))
+    if key=="site" and v is not None:
+        return SITE_KO.get(v,v)
+    if key=="parse_mode" and v is not None:
+        return PARSEMODE_KO.get(v,v)
+    return v
+
+def _widths(headers: list[str], sample_values: Iterable[list]) -> list[float]:
+    widths=[len(str(h)) for h in headers]
+    for values in sample_values:
+        for i,v in enumerate(values):
+            widths[i]=max(widths[i], len("" if v is None else str(v)))
+    return [min(max(10, w+2), 60) for w in widths]
+
+def _diag_values(row: dict) -> list:
+    timings=row.get("timings") if isinstance(row.get("timings"), dict) else {}
+    site=row.get("site"); mode=row.get("parse_mode")
+    return [SITE_KO.get(site,site), PARSEMODE_KO.get(mode,mode), row.get("url")]+[timings.get(k) for k in DIAG_COLUMN_KO]
+
+def write_xlsx(rows: Iterable[dict], out: IO[bytes], diagnostics: bool = False) -> int:
+    """행(dict)들을 읽으며 바로 시트에 쓴다(openpyxl write-only). 돌려주는 값은 쓴 행 수.
+
+    기본 컬럼은 고정이고 너비(와 그 밖의 키)만 앞쪽 WIDTH_SAMPLE개 행으로 정한다. 가격 서식은 컬럼마다
+    한 번만 만들어 두고 같은 셀 객체로 값을 흘려 쓰므로, 행 수와 무관하게 메모리가 일정하다.
+    SqliteResultStore.iter_rows()처럼 쿼리를 조금씩 읽는 이터레이터를 넘기면 전체 행을 메모리에 올리지 않는다.
+    """
+    it=iter(rows)
+    sample=list(islice(it, WIDTH_SAMPLE))
+    keys=_export_columns(sample)
+    headers=[COLUMN_KO.get(k,k) for k in keys]
+    money={i for i,k in enumerate(keys) if k in MONEY_COLUMNS}
+
+    wb=Workbook(write_only=True)
+    ws=wb.create_sheet("결과")
+    sample_values=([_export_value(k,r) for k in keys] for r in sample)
+    for i,w in enumerate(_widths(headers, sample_values), start=1):
+        ws.column_dimensions[get_column_letter(i)].width=w
+    # 가격 서식은 컬럼에 한 번 건다. 다만 엑셀은 값이 있는 셀에는 컬럼 서식이 아니라 셀 서식을 쓰므로,
+    # 컬럼마다 서식을 입힌 셀 하나를 만들어 값만 바꿔 가며 쓴다(append가 바로 직렬화하므로 재사용해도 안전).
+    won_cells={}
+    for i in money:
+        ws.column_dimensions[get_column_letter(i+1)].number_format=WON_FORMAT
+        won_cells[i]=WriteOnlyCell(ws)
+        won_cells[i].number_format=WON_FORMAT
+    ws.append(headers)
+
+    diag_ws=None
+    if diagnostics:
+        diag_headers=["서점","처리방식","상품 URL"]+list(DIAG_COLUMN_KO.values())
+        diag_ws=wb.create_sheet("진단")
+        for i,w in enumerate(_widths(diag_headers, (_diag_values(r) for r in sample)), start=1):
+            diag_ws.column_dimensions[get_column_letter(i)].width=w
+        diag_ws.append(diag_headers)
+
+    n=0
+    for row in chain(sample, it):
+        values=[]
+        for i,k in enumerate(keys):
+            v=_export_value(k,row)
+            if i in money and isinstance(v,(int,float)):
+                cell=won_cells[i]
+                cell.value=v
+                v=cell
+            values.append(v)
+        ws.append(values)
+        if diag_ws is not None:
+            diag_ws.append(_diag_values(row))
+        n+=1
+    wb.save(out)
+    return n
+
+def rows_to_xlsx_bytes(rows: Iterable[dict], diagnostics: bool = False) -> bytes:
     out=io.BytesIO()
-    with pd.ExcelWriter(out, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="결과")
-        ws=writer.sheets["결과"]
-        for i,col in enumerate(df.columns, start=1):
-            max_len=max([len(str(col))]+[len(str(x)) for x in df[col].astype(str).head(200)])
-            ws.column_dimensions[get_column_letter(i)].width=min(max(10, max_len+2), 60)
-
-        won_format='#,##0"원"'
-        for money_col in ["정가","판매가"]:
-            if money_col in df.columns:
-                idx=df.columns.get_loc(money_col)+1
-                for r in range(2, ws.max_row+1):
-                    cell=ws.cell(row=r, column=idx)
-                    if isinstance(cell.value,(int,float)) and cell.value is not None:
-                        cell.number_format=won_format
+    write_xlsx(rows, out, diagnostics=diagnostics)
     return out.getvalue()
+
+def to_xlsx_bytes(df_raw: pd.DataFrame, diagnostics: bool = False) -> bytes:
+    return rows_to_xlsx_bytes(df_raw.to_dict("records"), diagnostics=diagnostics)
@@ -0,0 +1,363 @@
+import json, sqlite3, threading, time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence
+
+DUPLICATE_ISBN_NOTE = "⚠ 동일 ISBN 중복"
+
+def _isbn_of(row: dict) -> str:
+    return str(row.get("isbn") or "").strip()
+
+class ResultStore:
+    """누적 결과 행 저장소. 상품 키와 ISBN 색인을 삽입/교체/삭제 때마다 함께 고친다.
+
+    행마다 바뀌지 않는 row id(삽입 순번)를 붙이며, 순회 순서는 처음 삽입된 순서다.
+    같은 상품 키의 행이 다시 들어오면 자리(row id)는 그대로 두고 내용만 바꾼다.
+    ISBN이 같은 행이 둘 이상이면 그 묶음의 모든 행에 DUPLICATE_ISBN_NOTE를 단다.
+    """
+
+    def __init__(self, key_func: Callable[[str], object]):
+        self._key_func = key_func
+        self._rows: Dict[int, dict] = {}
+        self._by_key: Dict[object, int] = {}
+        self._by_isbn: Dict[str, Dict[int, None]] = {}
+        self._next_id = 0
+        self.version = 0
+
+    def _key(self, row: dict):
+        return self._key_func(str(row.get("url") or ""))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._rows.values())
+
+    def iter_rows(self) -> Iterator[dict]:
+        return iter(self._rows.values())
+
+    def items(self) -> Iterable[tuple[int, dict]]:
+        return self._rows.items()
+
+    def row(self, row_id: int) -> dict:
+        return self._rows[row_id]
+
+    def get(self, url: str) -> Optional[dict]:
+        row_id = self._by_key.get(self._key_func(url or ""))
+        return None if row_id is None else self._rows[row_id]
+
+    def rows_sharing_isbn(self, isbn: str) -> list[dict]:
+        ids = self._by_isbn.get(str(isbn or "").strip(), {})
+        return [self._rows[i] for i in ids]
+
+    def duplicate_isbn_count(self) -> int:
+        return sum(1 for ids in self._by_isbn.values() if len(ids) > 1)
+
+    def _index_isbn(self, row_id: int, isbn: str, touched: set) -> None:
+        if not isbn:
+            return
+        ids = self._by_isbn.setdefault(isbn, {})
+        ids[row_id] = None
+        if len(ids) == 2:
+            # 혼자였던 행도 이제 중복이다
+            for other in ids:
+                if other != row_id:
+                    self._set_note(other, DUPLICATE_ISBN_NOTE, touched)
+        self._set_note(row_id, DUPLICATE_ISBN_NOTE if len(ids) > 1 else None, touched)
+
+    def _unindex_isbn(self, row_id: int, isbn: str, touched: set) -> None:
+        ids = self._by_isbn.get(isbn)
+        if not ids or row_id not in ids:
+            return
+        del ids[row_id]
+        if not ids:
+            del self._by_isbn[isbn]
+        elif len(ids) == 1:
+            self._set_note(next(iter(ids)), None, touched)
+
+    def _set_note(self, row_id: int, note: Optional[str], touched: set) -> None:
+        row = self._rows[row_id]
+        if note is None and row.get("note") != DUPLICATE_ISBN_NOTE:
+            return
+        if row.get("note") != note:
+            row["note"] = note
+            touched.add(row_id)
+
+    def upsert_many(self, rows: Iterable[dict]) -> tuple[int, int, list[int]]:
+        """행들을 넣는다. (신규 수, 교체 수, 내용이 바뀐 row id 목록)을 돌려준다."""
+        added = updated = 0
+        touched: set = set()
+        for row in rows:
+            key = self._key(row)
+            row_id = self._by_key.get(key) if key else None
+            if row_id is not None:
+                self._unindex_isbn(row_id, _isbn_of(self._rows[row_id]), touched)
+                updated += 1
+            else:
+                row_id = self._next_id
+                self._next_id += 1
+                if key:
+                    self._by_key[key] = row_id
+                added += 1
+            if row.get("note") == DUPLICATE_ISBN_NOTE:
+                row["note"] = None
+            self._rows[row_id] = row
+            touched.add(row_id)
+            self._index_isbn(row_id, _isbn_of(row), touched)
+        if touched:
+            self.version += 1
+        return added, updated, sorted(touched)
+
+    def delete(self, url: str) -> list[int]:
+        """URL(상품 키)의 행을 지운다. 지운 행과 중복 표시가 바뀐 행의 row id를 돌려준다."""
+        key = self._key_func(url or "")
+        row_id = self._by_key.pop(key, None)
+        if row_id is None:
+            return []
+        touched = {row_id}
+        self._unindex_isbn(row_id, _isbn_of(self._rows[row_id]), touched)
+        del self._rows[row_id]
+        self.version += 1
+        return sorted(touched)
+
+    def clear(self) -> None:
+        self._rows.clear()
+        self._by_key.clear()
+        self._by_isbn.clear()
+        self.version += 1
+
+def _key_text(key) -> Optional[str]:
+    """상품 키((site, product_id) 또는 URL)를 DB 컬럼 값으로. 빈 키는 NULL(항상 새 행)."""
+    if not key:
+        return None
+    return "\t".join(key) if isinstance(key, tuple) else str(key)
+
+def _with_note(row: dict, duplicate: bool) -> dict:
+    if duplicate:
+        row["note"] = DUPLICATE_ISBN_NOTE
+    elif row.get("note") == DUPLICATE_ISBN_NOTE:
+        row["note"] = None
+    return row
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT UNIQUE,
+    url TEXT,
+    site TEXT,
+    status TEXT,
+    isbn TEXT,
+    title TEXT,
+    fetched_at REAL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS results_isbn ON results(isbn);
+CREATE INDEX IF NOT EXISTS results_site ON results(site, status);
+CREATE INDEX IF NOT EXISTS results_fetched ON results(fetched_at);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER);
+"""
+
+# 중복 ISBN 여부는 저장하지 않고 읽을 때 ISBN 색인으로 센다
+_DUP_SQL = "(r.isbn IS NOT NULL AND (SELECT COUNT(*) FROM results d WHERE d.isbn = r.isbn) > 1)"
+
+class SqliteResultStore:
+    """ResultStore와 같은 인터페이스의 SQLite 저장소. 새로고침/탭 사이에도 결과가 남는다.
+
+    행 내용은 JSON으로 두고 상품 키(key), ISBN, 서점/처리상태, 수집 시각은 색인 컬럼으로 뺀다.
+    upsert_many는 한 트랜잭션으로 쓰고, 목록/엑셀은 query()/iter_rows()로 필요한 만큼만 읽는다.
+    version은 DB에 두므로 같은 파일을 여는 다른 세션의 변경도 보인다.
+    """
+
+    ITER_CHUNK = 500
+
+    def __init__(self, path: str, key_func: Callable[[str], object]):
+        self._key_func = key_func
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _key(self, url: str) -> Optional[str]:
+        return _key_text(self._key_func(str(url or "").strip()))
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            rec = self._conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        return rec[0] if rec else 0
+
+    def _bump_version(self) -> None:
+        self._conn.execute("INSERT INTO meta VALUES ('version', 1) "
+                           "ON CONFLICT(name) DO UPDATE SET value = value + 1")
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.iter_rows()
+
+    def _select(self, where: str = "", params: Sequence = (), tail: str = "") -> list[tuple[int, dict]]:
+        sql = f"SELECT r.id, r.data, {_DUP_SQL} FROM results r {where} {tail}"
+        with self._lock:
+            recs = self._conn.execute(sql, params).fetchall()
+        return [(i, _with_note(json.loads(data), bool(dup))) for i, data, dup in recs]
+
+    def iter_rows(self, **filters) -> Iterator[dict]:
+        """삽입 순서대로 ITER_CHUNK개씩 읽어 내보낸다(id 기준 이어 읽기라 도중에 써도 안전)."""
+        where, params = self._where(**filters)
+        last = -1
+        while True:
+            cond = f"{where} AND r.id > ?" if where else "WHERE r.id > ?"
+            chunk = self._select(cond, (*params, last), f"ORDER BY r.id LIMIT {self.ITER_CHUNK}")
+            if not chunk:
+                return
+            for _, row in chunk:
+                yield row
+            last = chunk[-1][0]
+
+    def items(self) -> list[tuple[int, dict]]:
+        return self._select(tail="ORDER BY r.id")
+
+    def row(self, row_id: int) -> dict:
+        found = self._select("WHERE r.id = ?", (row_id,))
+        if not found:
+            raise KeyError(row_id)
+        return found[0][1]
+
+    def get(self, url: str) -> Optional[dict]:
+        key = self._key(url)
+        found = self._select("WHERE r.key = ?", (key,)) if key else []
+        return found[0][1] if found else None
+
+    def rows_sharing_isbn(self, isbn: str) -> list[dict]:
+        isbn = str(isbn or "").strip()
+        return [row for _, row in self._select("WHERE r.isbn = ?", (isbn,), "ORDER BY r.id")] if isbn else []
+
+    def duplicate_isbn_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM (SELECT isbn FROM results WHERE isbn IS NOT NULL "
+                "GROUP BY isbn HAVING COUNT(*) > 1)").fetchone()[0]
+
+    @staticmethod
+    def _where(site: Optional[Sequence[str]] = None, status: Optional[str] = None,
+               text: Optional[str] = None) -> tuple[str, list]:
+        conds, params = [], []
+        if site:
+            conds.append(f"r.site IN ({','.join('?' * len(site))})")
+            params.extend(site)
+        if status:
+            conds.append("r.status = ?")
+            params.append(status)
+        if text:
+            # URL에 흔한 %와 _가 와일드카드로 먹히지 않게 글자 그대로 찾는다
+            term = text.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            conds.append("(r.title LIKE ? ESCAPE '\\' OR r.isbn LIKE ? ESCAPE '\\' OR r.url LIKE ? ESCAPE '\\')")
+            params.extend([f"%{term}%"] * 3)
+        return ("WHERE " + " AND ".join(conds)) if conds else "", params
+
+    def count(self, **filters) -> int:
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM results r {where}", params).fetchone()[0]
+
+    def query(self, offset: int = 0, limit: int = 100, newest_first: bool = False,
+              **filters) -> list[tuple[int, dict]]:
+        """조건(site 목록, status, 도서명/ISBN/URL 검색어)에 맞는 행 한 페이지. (row id, 행) 목록."""
+        where, params = self._where(**filters)
+        order = "ORDER BY r.fetched_at DESC, r.id DESC" if newest_first else "ORDER BY r.id"
+        return self._select(where, (*params, limit, offset), f"{order} LIMIT ? OFFSET ?")
+
+    def _group(self, isbns: Iterable[str]) -> Dict[str, list[int]]:
+        groups: Dict[str, list[int]] = {}
+        for isbn in isbns:
+            ids = [r[0] for r in self._conn.execute("SELECT id FROM results WHERE isbn = ?", (isbn,))]
+            groups[isbn] = ids
+        return groups
+
+    def upsert_many(self, rows: Iterable[dict]) -> tuple[int, int, list[int]]:
+        """행들을 한 트랜잭션으로 넣는다. (신규 수, 교체 수, 내용이 바뀐 row id 목록)을 돌려준다."""
+        added = updated = 0
+        touched: set = set()
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = list(rows)
+                keys = [self._key(row.get("url")) for row in rows]
+                isbns = {_isbn_of(row) for row in rows if _isbn_of(row)}
+                for key in {k for k in keys if k}:
+                    rec = self._conn.execute("SELECT isbn FROM results WHERE key = ?", (key,)).fetchone()
+                    if rec and rec[0]:
+                        isbns.add(rec[0])
+                before = self._group(isbns)
+                for row, key in zip(rows, keys):
+                    old = self._conn.execute("SELECT id FROM results WHERE key = ?",
+                                             (key,)).fetchone() if key else None
+                    data = dict(row)
+                    if data.get("note") == DUPLICATE_ISBN_NOTE:
+                        data["note"] = None
+                    values = (row.get("url"), row.get("site"), row.get("status"), _isbn_of(row) or None,
+                              row.get("title"), now, json.dumps(data, ensure_ascii=False, default=str))
+                    if old is not None:
+                        self._conn.execute("UPDATE results SET url = ?, site = ?, status = ?, isbn = ?, "
+                                           "title = ?, fetched_at = ?, data = ? WHERE id = ?", (*values, old[0]))
+                        row_id = old[0]
+                        updated += 1
+                    else:
+                        cur = self._conn.execute("INSERT INTO results (key, url, site, status, isbn, title, "
+                                                 "fetched_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (key, *values))
+                        row_id = cur.lastrowid
+                        added += 1
+                    touched.add(row_id)
+                # 묶음의 중복 여부가 바뀐 ISBN이면 그 묶음의 다른 행 비고도 바뀐 것이다
+                for isbn, ids in self._group(isbns).items():
+                    if (len(before[isbn]) > 1) != (len(ids) > 1):
+                        touched.update(ids)
+                        touched.update(before[isbn])
+                if touched:
+                    self._bump_version()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return added, updated, sorted(touched)
+
+    def delete(self, url: str) -> list[int]:
+        """URL(상품 키)의 행을 지운다. 지운 행과 중복 표시가 바뀐 행의 row id를 돌려준다."""
+        key = self._key(url)
+        if not key:
+            return []
+        with self._lock:
+            old = self._conn.execute("SELECT id, isbn FROM results WHERE key = ?", (key,)).fetchone()
+            if old is None:
+                return []
+            touched = {old[0]}
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM results WHERE id = ?", (old[0],))
+                if old[1]:
+                    rest = self._group([old[1]])[old[1]]
+                    if len(rest) == 1:
+                        touched.update(rest)
+                self._bump_version()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return sorted(touched)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM results")
+                self._bump_version()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
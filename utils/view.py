@@ -0,0 +1,116 @@
+from typing import Iterable, Mapping
+import pandas as pd
+
+STATUS_KO = {"success": "성공", "failed": "실패", "skipped": "제외"}
+PARSEMODE_KO = {
+    "requests": "자동",
+    "playwright": "브라우저",
+    "search-fallback": "검색보조",
+    "skipped": "제외",
+    "unknown": "알수없음",
+    "exception": "오류",
+    "circuit-open": "일시차단",
+}
+COLUMN_KO = {
+    "site": "서점",
+    "url": "상품 URL",
+    "status": "처리상태",
+    "isbn": "ISBN",
+    "title": "도서명",
+    "author": "저자",
+    "publisher": "출판사",
+    "list_price": "정가",
+    "sale_price": "판매가",
+    "product_id": "상품ID",
+    "parse_mode": "처리방식",
+    "error": "오류",
+    "note": "비고",
+}
+SITE_KO = {"KYobo": "교보문고", "YES24": "YES24", "ALADIN": "알라딘", "YPBOOKS": "영풍문고"}
+
+# 표에 보여줄 컬럼(원래 키)과 순서
+VIEW_KEYS = ["site", "url", "status", "isbn", "title", "author", "publisher",
+             "list_price", "sale_price", "note", "product_id", "parse_mode", "error"]
+MONEY_KEYS = ("list_price", "sale_price")
+
+def fmt_won(v):
+    if v is None:
+        return ""
+    try:
+        if pd.isna(v):
+            return ""
+    except Exception:
+        pass
+    try:
+        return f"{int(v):,}원"
+    except Exception:
+        return str(v)
+
+def format_rows(rows: list[dict]) -> pd.DataFrame:
+    """원본 행들을 화면용 표(한글 컬럼/값)로 바꾼다. 컬럼 단위로 한 번에 변환한다."""
+    raw = pd.DataFrame.from_records(rows, columns=VIEW_KEYS)
+    out = pd.DataFrame(index=raw.index)
+    for key in VIEW_KEYS:
+        col = raw[key]
+        if key == "site":
+            col = col.map(SITE_KO).fillna(col)
+        elif key == "status":
+            col = col.map(STATUS_KO).fillna(col)
+        elif key == "parse_mode":
+            col = col.map(PARSEMODE_KO).fillna(col)
+        elif key in MONEY_KEYS:
+            col = pd.Series([fmt_won(v) for v in col], index=raw.index, dtype=object)
+        out[COLUMN_KO[key]] = col.astype(object).where(col.notna(), None)
+    return out
+
+class ResultsView:
+    """누적 결과의 화면용 표. 추가/교체/삭제된 행(row id)만 다시 포맷한다.
+
+    표의 인덱스는 ResultStore의 row id이고, frame()은 마지막 변경 이후 같은 DataFrame
+    객체를 돌려주므로 관계없는 위젯 조작으로 다시 실행될 때는 변환 비용이 들지 않는다.
+    """
+
+    def __init__(self, items: Iterable[tuple[int, dict]] = ()):
+        items = list(items)
+        self._df = format_rows([row for _, row in items])
+        self._df.index = [row_id for row_id, _ in items]
+        self._success = self._count_success(self._df)
+
+    @staticmethod
+    def _count_success(df: pd.DataFrame) -> int:
+        return int((df[COLUMN_KO["status"]] == STATUS_KO["success"]).sum())
+
+    def __len__(self) -> int:
+        return len(self._df)
+
+    @property
+    def success_count(self) -> int:
+        return self._success
+
+    def frame(self) -> pd.DataFrame:
+        return self._df
+
+    def update(self, changed: Mapping[int, dict]) -> None:
+        """row id -> 행. 이미 있는 id는 제자리에서 바꾸고, 새 id는 뒤에 붙인다."""
+        if not changed:
+            return
+        ids = sorted(changed)
+        fmt = format_rows([changed[i] for i in ids])
+        fmt.index = ids
+        existing = [i for i in ids if i in self._df.index]
+        if existing:
+            self._success -= self._count_success(self._df.loc[existing])
+            self._df.loc[existing] = fmt.loc[existing]
+        new_ids = [i for i in ids if i not in self._df.index]
+        if new_ids:
+            self._df = pd.concat([self._df, fmt.loc[new_ids]]) if len(self._df) else fmt.loc[new_ids]
+        self._success += self._count_success(fmt)
+
+    def remove(self, ids: Iterable[int]) -> None:
+        ids = [i for i in ids if i in self._df.index]
+        if ids:
+            self._success -= self._count_success(self._df.loc[ids])
+            self._df = self._df.drop(index=ids)
+
+    def clear(self) -> None:
+        self.__init__()